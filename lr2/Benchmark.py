@@ -0,0 +1,668 @@
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import yaml
+
+import Buyers
+
+from Buyers import AsyncBuyerRepDB, Buyer, CachedBuyerRepDB, ConcurrentBuyerRep, BuyerRep, BuyerRepBinary, BuyerRepDB, BuyerRepDBAdapter, BuyerRepSQLite, BuyerShort, BuyerTable, BuyerRepJSON, BuyerRepYAML, DatabaseConnector
+
+
+def make_buyers(count, start_id=1):
+    return [Buyer(i, "Иван Петров", f"г. Москва, ул. Ленина, д. {i}", f"+7{i:010d}", "Мария")
+            for i in range(start_id, start_id + count)]
+
+
+def connect_db():
+    connector = DatabaseConnector.get_instance(os.environ.get("PGHOST", "localhost"),
+                                               os.environ.get("PGUSER", "postgres"),
+                                               os.environ.get("PGPASSWORD", ""),
+                                               os.environ.get("PGDATABASE", "buyers_bench"),
+                                               int(os.environ.get("PGPORT", 5432)))
+    if not connector.connected:
+        print("PostgreSQL недоступен (PGHOST/PGUSER/PGPASSWORD/PGDATABASE), замер пропущен.")
+        return None
+    return connector
+
+
+def reset_db(connector):
+    rep = BuyerRepDB(connector)
+    rep.initialize_db()
+    connector.execute_query("TRUNCATE Buyers RESTART IDENTITY")
+    return rep
+
+
+def measure(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def scan_get_buyer_by_id(buyers, buyer_id):
+    for buyer in buyers:
+        if buyer.get_id() == buyer_id:
+            return buyer
+    return None
+
+
+def scan_replace_buyer(buyers, buyer_id, buyer):
+    for i, b in enumerate(buyers):
+        if b.get_id() == buyer_id:
+            buyers[i] = buyer
+            return True
+    return False
+
+
+def bench_index(sizes=(10_000, 100_000, 1_000_000), ops=200):
+    print("Поиск, замена и удаление покупателя по ID (мкс на операцию)")
+    print(f"{'N':>10} {'операция':>10} {'перебор':>12} {'индекс':>12} {'ускорение':>10}")
+    for size in sizes:
+        buyers = make_buyers(size)
+        rep = BuyerRep()
+        rep.buyers = list(buyers)
+        ids = [random.randint(1, size) for _ in range(ops)]
+        replacement = Buyer(0, "Петр Иванов", "г. Казань", "+70000000000", "Анна")
+
+        results = {}
+        it = iter(ids * 2)
+        results["поиск"] = (measure(lambda: scan_get_buyer_by_id(buyers, next(it)), ops),
+                            measure(lambda: rep.get_buyer_by_id(next(it)), ops))
+
+        it = iter(ids * 2)
+        phones = (f"+9{i:010d}" for i in range(ops))
+
+        def indexed_replace():
+            buyer_id = next(it)
+            assert rep.replace_buyer(buyer_id, "Петр Иванов", "г. Казань", next(phones), "Анна")
+
+        results["замена"] = (measure(lambda: scan_replace_buyer(buyers, next(it), replacement), ops),
+                             measure(indexed_replace, ops))
+
+        delete_ids = random.sample(range(1, size + 1), ops)
+        it = iter(delete_ids)
+
+        def scan_delete():
+            nonlocal buyers
+            buyer_id = next(it)
+            buyers = [b for b in buyers if b.get_id() != buyer_id]
+
+        scan_time = measure(scan_delete, max(1, ops // 20))
+        it = iter(delete_ids)
+        results["удаление"] = (scan_time, measure(lambda: rep.delete_buyer(next(it)), ops))
+
+        for name, (scan, indexed) in results.items():
+            print(f"{size:>10} {name:>10} {scan * 1e6:>12.2f} {indexed * 1e6:>12.2f} {scan / indexed:>9.0f}x")
+
+
+def bench_journal(sizes=(1_000, 10_000, 50_000), adds=50):
+    print("Добавление покупателей в JSON-хранилище (мс на операцию)")
+    print(f"{'N':>10} {'перезапись':>12} {'журнал':>12} {'ускорение':>10}")
+    for size in sizes:
+        times = []
+        for journal in (False, True):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "buyers.json")
+                rep = BuyerRepJSON(path, journal=journal, compact_threshold=1 << 30)
+                rep.buyers = make_buyers(size)
+                rep.next_id = size + 1
+                rep.save_data()
+                start = time.perf_counter()
+                for i in range(adds):
+                    rep.add_buyer("Петр Иванов", "г. Казань", f"+8{i:010d}", "Анна")
+                times.append((time.perf_counter() - start) / adds)
+                if journal:
+                    assert BuyerRepJSON(path, journal=True).get_count() == size + adds
+        print(f"{size:>10} {times[0] * 1e3:>12.3f} {times[1] * 1e3:>12.3f} {times[0] / times[1]:>9.0f}x")
+
+
+def bench_batch(sizes=(200, 1_000), backends=(BuyerRepJSON, BuyerRepYAML)):
+    print("Массовое добавление покупателей (с)")
+    print(f"{'хранилище':>14} {'N':>8} {'по одному':>12} {'add_buyers':>12}")
+    for rep_class in backends:
+        for size in sizes:
+            rows = [("Петр Иванов", "г. Казань", f"+8{i:010d}", "Анна") for i in range(size)]
+            times = []
+            for bulk in (False, True):
+                with tempfile.TemporaryDirectory() as tmp:
+                    rep = rep_class(os.path.join(tmp, "buyers"))
+                    start = time.perf_counter()
+                    if bulk:
+                        rep.add_buyers(rows)
+                    else:
+                        for row in rows:
+                            rep.add_buyer(*row)
+                    times.append(time.perf_counter() - start)
+            print(f"{rep_class.__name__:>14} {size:>8} {times[0]:>12.3f} {times[1]:>12.3f}")
+
+
+def bench_sqlite_insert(size=20_000, chunk_size=1000):
+    rows = [(b.get_id(), b.get_name(), b.get_address(), b.get_phone(), b.get_contact()) for b in make_buyers(size)]
+    query = "INSERT INTO Buyers (ID, Name, Address, Phone, Contact) VALUES (?, ?, ?, ?, ?)"
+    print("Вставка покупателей в SQLite вместо PostgreSQL (строк/с)")
+    with tempfile.TemporaryDirectory() as tmp:
+        connection = sqlite3.connect(os.path.join(tmp, "buyers.db"), isolation_level=None)
+        connection.execute("CREATE TABLE Buyers (ID INTEGER PRIMARY KEY, Name TEXT NOT NULL, Address TEXT NOT NULL, "
+                           "Phone TEXT NOT NULL UNIQUE, Contact TEXT NOT NULL)")
+        start = time.perf_counter()
+        for row in rows:
+            connection.execute(query, row)
+        single = size / (time.perf_counter() - start)
+        connection.execute("DELETE FROM Buyers")
+        start = time.perf_counter()
+        for offset in range(0, size, chunk_size):
+            connection.execute("BEGIN")
+            connection.executemany(query, rows[offset:offset + chunk_size])
+            connection.execute("COMMIT")
+        bulk = size / (time.perf_counter() - start)
+        assert connection.execute("SELECT COUNT(*) FROM Buyers").fetchone()[0] == size
+        connection.close()
+    print(f"{'по одной строке':>20} {single:>12.0f}")
+    print(f"{'executemany':>20} {bulk:>12.0f} ({bulk / single:.0f}x)")
+
+
+def bench_db_insert(size=20_000, chunk_size=1000):
+    connector = connect_db()
+    if connector is None:
+        bench_sqlite_insert(size, chunk_size)
+        return
+    buyers = make_buyers(size)
+    print("Вставка покупателей в PostgreSQL (строк/с)")
+    rep = reset_db(connector)
+    start = time.perf_counter()
+    for buyer in buyers:
+        rep.add_buyer(buyer)
+    single = size / (time.perf_counter() - start)
+    rep = reset_db(connector)
+    start = time.perf_counter()
+    rep.add_buyers(buyers, chunk_size=chunk_size)
+    bulk = size / (time.perf_counter() - start)
+    print(f"{'по одной строке':>20} {single:>12.0f}")
+    print(f"{'add_buyers':>20} {bulk:>12.0f} ({bulk / single:.0f}x)")
+
+
+def bench_db_pool(threads=(1, 2, 4, 8), size=10_000, seconds=2.0):
+    connector = connect_db()
+    if connector is None:
+        return
+    rep = reset_db(connector)
+    rep.add_buyers(make_buyers(size))
+    print("Поиск по ID из нескольких потоков через пул соединений (запросов/с)")
+    for count in threads:
+        pool = DatabaseConnector(connector._params["host"], connector._params["user"],
+                                 connector._params["password"], connector._params["database"],
+                                 connector._params["port"], max_size=count)
+        pooled_rep = BuyerRepDB(pool)
+        done = [0] * count
+        deadline = time.perf_counter() + seconds
+
+        def worker(index):
+            while time.perf_counter() < deadline:
+                pooled_rep.get_buyer_by_id(random.randint(1, size))
+                done[index] += 1
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        pool.close()
+        print(f"{count:>4} потоков {sum(done) / seconds:>12.0f}")
+
+
+def bench_db_async(concurrency=(1, 10, 100, 500), size=10_000, lookups=5_000):
+    connector = connect_db()
+    if connector is None:
+        return
+    if Buyers.asyncpg is None:
+        print("Пакет asyncpg не установлен, замер пропущен.")
+        return
+    rep = reset_db(connector)
+    rep.add_buyers(make_buyers(size))
+    ids = [random.randint(1, size) for _ in range(lookups)]
+    print("Поиск по ID через AsyncBuyerRepDB из одного потока (запросов/с)")
+
+    async def run(limit):
+        async with AsyncBuyerRepDB(**connector._params, max_size=min(limit, 50)) as async_rep:
+            gate = asyncio.Semaphore(limit)
+
+            async def lookup(buyer_id):
+                async with gate:
+                    return await async_rep.get_buyer_by_id(buyer_id)
+
+            start = time.perf_counter()
+            found = await asyncio.gather(*(lookup(buyer_id) for buyer_id in ids))
+            elapsed = time.perf_counter() - start
+            assert all(found)
+            return elapsed
+
+    for limit in concurrency:
+        print(f"{limit:>4} запросов в полёте {lookups / asyncio.run(run(limit)):>12.0f}")
+
+
+def bench_db_cache(size=10_000, lookups=20_000, cache_sizes=(0, 100, 1_000)):
+    connector = connect_db()
+    if connector is None:
+        return
+    rep = reset_db(connector)
+    rep.add_buyers(make_buyers(size))
+    hot = [int(size * random.random() ** 4) + 1 for _ in range(lookups)]
+    print("Поиск по ID с перекосом к частым покупателям через LRU-кэш")
+    print(f"{'размер кэша':>12} {'запросов/с':>12} {'попадания':>10} {'промахи':>10} {'вытеснения':>11}")
+    for cache_size in cache_sizes:
+        cached = CachedBuyerRepDB(rep, cache_size) if cache_size else rep
+        start = time.perf_counter()
+        for buyer_id in hot:
+            cached.get_buyer_by_id(buyer_id)
+        rate = lookups / (time.perf_counter() - start)
+        stats = cached.cache_stats()["buyers"] if cache_size else {"hits": 0, "misses": lookups, "evictions": 0}
+        print(f"{cache_size:>12} {rate:>12.0f} {stats['hits']:>10} {stats['misses']:>10} {stats['evictions']:>11}")
+
+
+def bench_db_prepared(size=10_000, loops=5_000):
+    connector = connect_db()
+    if connector is None:
+        return
+    print("Задержка запросов с подготовленными операторами и без них (мкс)")
+    print(f"{'режим':>12} {'поиск по ID':>12} {'по имени':>10} {'вставка':>10}")
+    for label, threshold in (("без PREPARE", None), ("PREPARE", 5)):
+        pool = DatabaseConnector(**connector._params, prepare_threshold=threshold)
+        rep = reset_db(pool)
+        rep.add_buyers(make_buyers(size))
+        ids = iter([random.randint(1, size) for _ in range(loops)])
+        lookup = measure(lambda: rep.get_buyer_by_id(next(ids)), loops)
+        search = measure(lambda: rep.find_buyers_by_name("Пет", 10), loops)
+        new_buyers = iter(make_buyers(loops, size + 1))
+        insert = measure(lambda: rep.add_buyer(next(new_buyers)), loops)
+        pool.close()
+        print(f"{label:>12} {lookup * 1e6:>12.1f} {search * 1e6:>10.1f} {insert * 1e6:>10.1f}")
+
+
+def row_by_row_delete(connector, buyer_id):
+    rows = connector.execute_query("SELECT ID FROM Buyers WHERE ID > %s", (buyer_id,)).fetchall()
+    connector.execute_query("DELETE FROM Buyers WHERE ID = %s", (buyer_id,))
+    for (row_id,) in rows:
+        connector.execute_query("UPDATE Buyers SET ID = %s WHERE ID = %s", (row_id - 1, row_id))
+
+
+def bench_db_delete(sizes=(1_000, 10_000, 50_000)):
+    connector = connect_db()
+    if connector is None:
+        return
+    print("Удаление первого покупателя в PostgreSQL (мс)")
+    print(f"{'N':>10} {'построчно':>12} {'одним UPDATE':>14} {'без перенумерации':>18}")
+    for size in sizes:
+        times = []
+        for mode in ("rows", "set", "stable"):
+            rep = reset_db(connector)
+            rep.add_buyers(make_buyers(size))
+            rep.renumber_ids = mode == "set"
+            start = time.perf_counter()
+            if mode == "rows":
+                row_by_row_delete(connector, 1)
+            else:
+                rep.delete_buyer(1)
+            times.append(time.perf_counter() - start)
+        print(f"{size:>10} {times[0] * 1e3:>12.1f} {times[1] * 1e3:>14.1f} {times[2] * 1e3:>18.2f}")
+
+
+def bench_db_paging(size=200_000, page_size=20, pages=(1, 100, 1_000, 10_000)):
+    connector = connect_db()
+    if connector is None:
+        return
+    rep = reset_db(connector)
+    rep.add_buyers(make_buyers(size), chunk_size=5000)
+    print(f"Чтение страницы из {page_size} покупателей в PostgreSQL (мс)")
+    print(f"{'страница':>10} {'OFFSET':>10} {'после ID':>10}")
+    for page in pages:
+        offset = measure(lambda: rep.get_k_n_short_list((page - 1) * page_size + 1, page_size), 20)
+        after_id = (page - 1) * page_size
+        keyset = measure(lambda: rep.get_page_after(after_id, page_size), 20)
+        print(f"{page:>10} {offset * 1e3:>10.2f} {keyset * 1e3:>10.2f}")
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench_db_stream(size=200_000, batch_size=2000):
+    connector = connect_db()
+    if connector is None:
+        return
+    rep = reset_db(connector)
+    rep.add_buyers(make_buyers(size), chunk_size=5000)
+    print(f"Полный проход по {size} покупателям PostgreSQL")
+
+    def scan_list():
+        for buyer in rep.get_all_buyers():
+            buyer.get_id()
+
+    def scan_stream():
+        for buyer in rep.iter_buyers(batch_size):
+            buyer.get_id()
+
+    for name, func in (("get_all_buyers", scan_list), ("iter_buyers", scan_stream)):
+        elapsed, peak = peak_memory(func)
+        print(f"{name:>16} {elapsed:>8.2f} с {peak / 2 ** 20:>10.2f} МБ")
+
+
+def bench_validation(size=1_000_000):
+    rows = [(i, "Иван Петров", "г. Москва", f"+7{i:010d}", "Мария") for i in range(size)]
+    print(f"Создание {size} объектов Buyer (с)")
+    for name, factory in (("с проверкой", Buyer), ("from_trusted", Buyer.from_trusted)):
+        start = time.perf_counter()
+        for row in rows:
+            factory(*row)
+        print(f"{name:>14} {time.perf_counter() - start:>8.2f}")
+
+
+def bench_memory(size=1_000_000):
+    print(f"Память под {size} покупателей, загруженных из файла (МБ)")
+    print(f"{'хранилище':>12} {'загрузка':>10} {'чтение':>10}")
+    for name, store in (("dict", dict), ("BuyerTable", BuyerTable)):
+        tracemalloc.start()
+        rep = BuyerRep(store=store)
+        rep.buyers = (Buyer.from_trusted(i, " ".join(("Иван", "Петров")), f"г. Москва, ул. Ленина, д. {i}",
+                                         f"+7{i:010d}", "".join(("Мар", "ия")))
+                      for i in range(1, size + 1))
+        loaded = tracemalloc.get_traced_memory()[0]
+        assert len(rep.get_all_buyers()) == size
+        rep.get_k_n_short_list(size // 2, 20)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{name:>12} {loaded / 2 ** 20:>10.1f} {used / 2 ** 20:>10.1f}")
+        del rep
+
+
+def bench_sorted(sizes=(10_000, 100_000), rounds=50, page_size=20):
+    names = ("Иван Петров", "Анна Смирнова", "Олег Волков", "Петр Иванов", "Мария Козлова")
+    print("Добавление покупателя и чтение страницы, упорядоченной по имени (мс на раунд)")
+    print(f"{'N':>10} {'сортировка':>12} {'представление':>14}")
+    for size in sizes:
+        results = []
+        for presorted in (False, True):
+            rep = BuyerRep()
+            rep.buyers = [Buyer.from_trusted(i, names[i % len(names)], "г. Казань", f"+7{i:010d}", "Анна")
+                          for i in range(1, size + 1)]
+            rep.next_id = size + 1
+            if presorted:
+                rep.sort_by_field("name")
+            start = time.perf_counter()
+            for i in range(rounds):
+                rep.add_buyer(names[i % len(names)], "г. Казань", f"+8{i:010d}", "Анна")
+                k = random.randint(1, size)
+                if presorted:
+                    rep.get_k_n_short_list(k, page_size)
+                else:
+                    ordered = sorted(rep.get_all_buyers(), key=lambda b: b.get_name())
+                    [BuyerShort(b) for b in ordered[k - 1:k - 1 + page_size]]
+            results.append((time.perf_counter() - start) / rounds)
+        print(f"{size:>10} {results[0] * 1e3:>12.2f} {results[1] * 1e3:>14.3f}")
+
+
+def bench_yaml(size=100_000):
+    buyers = [Buyer.from_trusted(*row) for row in
+              ((i, "Иван Петров", f"г. Москва, ул. Ленина, д. {i}", f"+7{i:010d}", "Мария")
+               for i in range(1, size + 1))]
+    variants = (("Python", yaml.SafeLoader, yaml.SafeDumper, False),
+                ("libyaml", Buyers.YAML_LOADER, Buyers.YAML_DUMPER, False),
+                ("libyaml, потоки", Buyers.YAML_LOADER, Buyers.YAML_DUMPER, True))
+    saved = Buyers.YAML_LOADER, Buyers.YAML_DUMPER
+    print(f"YAML-хранилище на {size} покупателей (с)")
+    print(f"{'вариант':>18} {'сохранение':>12} {'загрузка':>10}")
+    try:
+        for name, loader, dumper, multi_document in variants:
+            Buyers.YAML_LOADER, Buyers.YAML_DUMPER = loader, dumper
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "buyers.yaml")
+                rep = BuyerRepYAML(path, multi_document=multi_document)
+                rep.buyers = buyers
+                start = time.perf_counter()
+                rep.save_data()
+                save_time = time.perf_counter() - start
+                start = time.perf_counter()
+                loaded = BuyerRepYAML(path, trusted=True, multi_document=multi_document)
+                load_time = time.perf_counter() - start
+                assert loaded.get_count() == size
+            print(f"{name:>18} {save_time:>12.2f} {load_time:>10.2f}")
+    finally:
+        Buyers.YAML_LOADER, Buyers.YAML_DUMPER = saved
+
+
+def bench_binary(size=1_000_000):
+    buyers = [Buyer.from_trusted(i, "Иван Петров", f"г. Москва, ул. Ленина, д. {i}", f"+7{i:010d}", "Мария")
+              for i in range(1, size + 1)]
+    print(f"Запуск хранилища на {size} покупателей и первые запросы (с)")
+    print(f"{'хранилище':>16} {'сохранение':>12} {'открытие':>10} {'по ID + страница':>18}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rep_class in (BuyerRepJSON, BuyerRepBinary):
+            path = os.path.join(tmp, rep_class.__name__)
+            rep = rep_class(path)
+            rep.buyers = buyers
+            rep.next_id = size + 1
+            start = time.perf_counter()
+            rep.save_data()
+            save_time = time.perf_counter() - start
+            start = time.perf_counter()
+            loaded = rep_class(path, trusted=True)
+            open_time = time.perf_counter() - start
+            start = time.perf_counter()
+            assert loaded.get_buyer_by_id(size // 2).get_id() == size // 2
+            assert len(loaded.get_k_n_short_list(size - 10, 20)) == 11
+            query_time = time.perf_counter() - start
+            print(f"{rep_class.__name__:>16} {save_time:>12.3f} {open_time:>10.4f} {query_time:>18.5f}")
+            del rep, loaded
+
+
+def bench_backends(size=5_000, adds=20, lookups=1_000):
+    rows = [("Иван Петров", f"г. Москва, ул. Ленина, д. {i}", f"+7{i:010d}", "Мария") for i in range(size)]
+    print(f"Сравнение хранилищ на {size} покупателях")
+    print(f"{'хранилище':>18} {'загрузка, с':>12} {'добавление, мс':>15} {'по ID, мкс':>11} {'открытие, с':>12}")
+    connector = connect_db()
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [(rep_class.__name__, lambda rep_class=rep_class: rep_class(os.path.join(tmp, rep_class.__name__)))
+                    for rep_class in (BuyerRepJSON, BuyerRepYAML, BuyerRepBinary, BuyerRepSQLite)]
+        if connector is not None:
+            reset_db(connector)
+            backends.append(("BuyerRepDBAdapter", lambda: BuyerRepDBAdapter(connector)))
+        for name, open_rep in backends:
+            rep = open_rep()
+            start = time.perf_counter()
+            rep.add_buyers(rows)
+            load_time = time.perf_counter() - start
+            start = time.perf_counter()
+            for i in range(adds):
+                rep.add_buyer("Петр Иванов", "г. Казань", f"+8{i:010d}", "Анна")
+            add_time = (time.perf_counter() - start) / adds
+            ids = [random.randint(1, size) for _ in range(lookups)]
+            start = time.perf_counter()
+            for buyer_id in ids:
+                rep.get_buyer_by_id(buyer_id)
+            lookup_time = (time.perf_counter() - start) / lookups
+            if hasattr(rep, "close"):
+                rep.close()
+            start = time.perf_counter()
+            rep = open_rep()
+            open_time = time.perf_counter() - start
+            assert rep.get_count() == size + adds
+            print(f"{name:>18} {load_time:>12.3f} {add_time * 1e3:>15.2f} {lookup_time * 1e6:>11.1f} {open_time:>12.3f}")
+
+
+def bench_parallel_load(size=200_000, workers=(1, 2, 4)):
+    print(f"Загрузка {size} покупателей из JSON с проверкой в нескольких процессах, ядер: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "buyers.json")
+        source = BuyerRepJSON(path)
+        source.buyers = make_buyers(size)
+        source.save_data()
+        for count in workers:
+            start = time.perf_counter()
+            loaded = BuyerRepJSON(path, workers=count)
+            elapsed = time.perf_counter() - start
+            assert loaded.get_count() == size
+            print(f"{count:>4} процессов {elapsed:>8.2f} с")
+
+
+def bench_durability(size=2_000, adds=200):
+    print(f"Одиночные добавления в JSON на {size} покупателях по режимам надежности (добавлений/с)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in Buyers.DURABILITY_MODES:
+            path = os.path.join(tmp, f"{mode}.json")
+            rep = BuyerRepJSON(path, durability=mode)
+            rep.add_buyers([(b.get_name(), b.get_address(), b.get_phone(), b.get_contact())
+                            for b in make_buyers(size)])
+            rep.flush()
+            start = time.perf_counter()
+            for i in range(adds):
+                rep.add_buyer("Петр Иванов", "г. Казань", f"+8{i:010d}", "Анна")
+            rep.close()
+            elapsed = time.perf_counter() - start
+            assert BuyerRepJSON(path).get_count() == size + adds
+            print(f"{mode:>8} {adds / elapsed:>10.0f}")
+
+
+def bench_write_behind(sizes=(1_000, 10_000, 50_000), adds=50):
+    print("Задержка add_buyer в JSON с синхронной и фоновой записью (мс)")
+    print(f"{'N':>8} {'синхронно':>10} {'в фоне':>8} {'close':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            times = []
+            for write_behind in (False, True):
+                path = os.path.join(tmp, f"{size}_{write_behind}.json")
+                rep = BuyerRepJSON(path, write_behind=write_behind)
+                rep.add_buyers([(b.get_name(), b.get_address(), b.get_phone(), b.get_contact())
+                                for b in make_buyers(size)])
+                rep.flush()
+                start = time.perf_counter()
+                for i in range(adds):
+                    rep.add_buyer("Петр Иванов", "г. Казань", f"+8{i:010d}", "Анна")
+                times.append((time.perf_counter() - start) / adds)
+                start = time.perf_counter()
+                rep.close()
+                close_time = time.perf_counter() - start
+                assert BuyerRepJSON(path).get_count() == size + adds
+            print(f"{size:>8} {times[0] * 1e3:>10.2f} {times[1] * 1e3:>8.3f} {close_time * 1e3:>8.1f}")
+
+
+def bench_concurrent(size=10_000, readers=4, writers=(0, 1, 2), seconds=2.0, backends=(BuyerRep, BuyerRepSQLite)):
+    print(f"Чтение из ConcurrentBuyerRep: {readers} читателя, {size} покупателей")
+    print(f"{'хранилище':>14} {'писателей':>10} {'чтений/с':>10} {'записей/с':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rep_class in backends:
+            for writer_count in writers:
+                rep = ConcurrentBuyerRep(rep_class(os.path.join(tmp, f"{rep_class.__name__}_{writer_count}")))
+                rep.add_buyers([(b.get_name(), b.get_address(), b.get_phone(), b.get_contact())
+                                for b in make_buyers(size)])
+                reads = [0] * readers
+                writes = [0] * writer_count
+                deadline = time.perf_counter() + seconds
+
+                def reader(index):
+                    while time.perf_counter() < deadline:
+                        rep.get_buyer_by_id(random.randint(1, size))
+                        rep.get_k_n_short_list(random.randint(1, size), 10)
+                        reads[index] += 2
+
+                def writer(index):
+                    i = 0
+                    while time.perf_counter() < deadline:
+                        phone = f"+9{index}{i:09d}"
+                        rep.add_buyer("Петр Иванов", "г. Казань", phone, "Анна")
+                        rep.delete_buyer(rep.get_buyer_by_phone(phone).get_id())
+                        writes[index] += 2
+                        i += 1
+
+                threads = ([threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+                           + [threading.Thread(target=writer, args=(i,)) for i in range(writer_count)])
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                assert rep.get_count() == size
+                assert len(rep.get_all_buyers()) == size
+                rep.close()
+                print(f"{rep_class.__name__:>14} {writer_count:>10} {sum(reads) / seconds:>10.0f} "
+                      f"{sum(writes) / seconds:>10.0f}")
+
+
+def bench_snapshots(sizes=(10_000, 100_000), repeat=200, seconds=2.0):
+    print("Получение списка покупателей: копия списка и снимок (мкс), добавление со снимками (мкс)")
+    print(f"{'N':>8} {'копия':>10} {'снимок':>8} {'add без':>8} {'add со':>8} {'чтений/с':>10}")
+    for size in sizes:
+        rep = BuyerRep()
+        rep.buyers = make_buyers(size)
+        rep.next_id = size + 1
+        copy_time = measure(lambda: list(rep.buyers), repeat)
+        plain_add = measure(lambda: rep.add_buyer("Петр Иванов", "г. Казань", f"+8{rep.next_id:010d}", "Анна"),
+                            repeat)
+        rep.snapshot()
+        snapshot_time = measure(rep.get_all_buyers, repeat)
+        snapshot_add = measure(lambda: rep.add_buyer("Петр Иванов", "г. Казань", f"+8{rep.next_id:010d}", "Анна"),
+                               repeat)
+        concurrent = ConcurrentBuyerRep(rep)
+        reads = [0, 0]
+        deadline = time.perf_counter() + seconds
+
+        def reader(index):
+            while time.perf_counter() < deadline:
+                snapshot = concurrent.snapshot()
+                assert snapshot[len(snapshot) - 1] is not None
+                reads[index] += 1
+
+        def writer():
+            while time.perf_counter() < deadline:
+                concurrent.add_buyer("Петр Иванов", "г. Казань", f"+9{concurrent.next_id:010d}", "Анна")
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(2)] + [threading.Thread(target=writer)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(concurrent.snapshot()) == concurrent.get_count()
+        print(f"{size:>8} {copy_time * 1e6:>10.1f} {snapshot_time * 1e6:>8.2f} {plain_add * 1e6:>8.1f} "
+              f"{snapshot_add * 1e6:>8.1f} {sum(reads) / seconds:>10.0f}")
+
+
+BENCHMARKS = {
+    "index": bench_index,
+    "journal": bench_journal,
+    "batch": bench_batch,
+    "db_insert": bench_db_insert,
+    "db_pool": bench_db_pool,
+    "db_delete": bench_db_delete,
+    "db_paging": bench_db_paging,
+    "db_stream": bench_db_stream,
+    "validation": bench_validation,
+    "memory": bench_memory,
+    "sorted": bench_sorted,
+    "yaml": bench_yaml,
+    "binary": bench_binary,
+    "backends": bench_backends,
+    "db_async": bench_db_async,
+    "db_cache": bench_db_cache,
+    "db_prepared": bench_db_prepared,
+    "parallel_load": bench_parallel_load,
+    "durability": bench_durability,
+    "write_behind": bench_write_behind,
+    "concurrent": bench_concurrent,
+    "snapshots": bench_snapshots,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
@@ -1,46 +1,148 @@
 import yaml
 import os
 import json
+import mmap
+import multiprocessing
 import psycopg2
+import psycopg2.extras
 import re
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count, islice
+from contextlib import contextmanager
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+NAME_PATTERN = re.compile(r"[А-Яа-яЁё]+\s[А-Яа-яЁё]+")
+PHONE_PATTERN = re.compile(r"^\+\d+$")
+
+FIELD_RULES = {
+    "Имя": ((NAME_PATTERN.fullmatch, "должно содержать имя и фамилию"),),
+    "Телефон": ((PHONE_PATTERN.match, "должно начинаться с '+' и содержать только цифры"),),
+    "Контактное лицо": ((str.isalpha, "должно содержать только буквы"),),
+}
+
+
+def compile_validator(field_name, expected_type):
+    type_message = f"Поле '{field_name}' должно быть типа {expected_type}."
+    if expected_type is not str:
+        return lambda value: None if isinstance(value, expected_type) else type_message
+    empty_message = f"Поле '{field_name}' не может быть пустым."
+    rules = tuple((rule, f"Поле '{field_name}' {message}.") for rule, message in FIELD_RULES.get(field_name, ()))
+
+    def validator(value):
+        if not isinstance(value, str):
+            return type_message
+        if not value:
+            return empty_message
+        for rule, message in rules:
+            if not rule(value):
+                return message
+        return None
+
+    return validator
+
+
+BUYER_VALIDATORS = tuple(compile_validator(field_name, str)
+                         for field_name in ("Имя", "Адрес", "Телефон", "Контактное лицо"))
+
+
+def validate_buyer_row(row):
+    if len(row) != 5:
+        return "Запись должна содержать 5 полей."
+    if not isinstance(row[0], int):
+        return "Поле 'ID' должно быть типа <class 'int'>."
+    for validator, value in zip(BUYER_VALIDATORS, row[1:]):
+        message = validator(value)
+        if message is not None:
+            return message
+    return None
+
+
+def validate_buyer_rows(start, rows):
+    errors = []
+    for position, row in enumerate(rows, start):
+        message = validate_buyer_row(row)
+        if message is not None:
+            errors.append((position, message))
+    return errors
+
+
+shared_rows = ()
+
+
+def validate_shared_rows(start, stop):
+    return validate_buyer_rows(start + 1, shared_rows[start:stop])
+
+
+def validate_rows_in_processes(rows, workers):
+    global shared_rows
+    chunk_size = -(-len(rows) // (workers * 4))
+    starts = range(0, len(rows), chunk_size)
+    if "fork" not in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(workers) as executor:
+            return list(executor.map(validate_buyer_rows, [start + 1 for start in starts],
+                                     [rows[start:start + chunk_size] for start in starts]))
+    shared_rows = rows
+    try:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")) as executor:
+            return list(executor.map(validate_shared_rows, starts, [start + chunk_size for start in starts]))
+    finally:
+        shared_rows = ()
 
 
 class Buyer:
+    __slots__ = ("_id", "_name", "_address", "_phone", "_contact")
+    _validators = {}
+
     @staticmethod
     def validate(field_name, field_value, expected_type):
-        if not isinstance(field_value, expected_type):
-            print(f"Поле '{field_name}' должно быть типа {expected_type}.")
-            return False
-        if expected_type is str and not field_value:  
-            print(f"Поле '{field_name}' не может быть пустым.")
-            return False
-        if expected_type is str and field_name == "Имя":
-            if not re.fullmatch(r"[А-Яа-яЁё]+\s[А-Яа-яЁё]+", field_value):
-                print(f"Поле '{field_name}' должно содержать имя и фамилию.")
-                return False
-        if expected_type is str and field_name == "Контактное лицо" and not field_value.isalpha():
-            print(f"Поле '{field_name}' должно содержать только буквы.")
-            return False
-        if expected_type is str and field_name == "Телефон" and not re.match(r"^\+\d+$", field_value):
-            print(f"Поле '{field_name}' должно начинаться с '+' и содержать только цифры.")
+        validator = Buyer._validators.get((field_name, expected_type))
+        if validator is None:
+            validator = Buyer._validators[(field_name, expected_type)] = compile_validator(field_name, expected_type)
+        message = validator(field_value)
+        if message is not None:
+            print(message)
             return False
         return True
 
     def __init__(self, id, name, address, phone, contact):
+        for validator, value in zip(BUYER_VALIDATORS, (name, address, phone, contact)):
+            message = validator(value)
+            if message is not None:
+                print(message)
+                raise ValueError("Некорректные данные")
         self._id = id
-        if not Buyer.validate("Имя", name, str):
-            raise ValueError("Некорректные данные")
         self._name = name
-        if not Buyer.validate("Адрес", address, str):
-            raise ValueError("Некорректные данные")
         self._address = address
-        if not Buyer.validate("Телефон", phone, str):
-            raise ValueError("Некорректные данные")
         self._phone = phone
-        if not Buyer.validate("Контактное лицо", contact, str):
-            raise ValueError("Некорректные данные")
         self._contact = contact
 
+    @classmethod
+    def from_trusted(cls, id, name, address, phone, contact):
+        buyer = cls.__new__(cls)
+        buyer._id = id
+        buyer._name = name
+        buyer._address = address
+        buyer._phone = phone
+        buyer._contact = contact
+        return buyer
+
     def get_id(self):
         return self._id
 
@@ -71,6 +173,13 @@ class Buyer:
     def set_contact(self, contact):
         self._contact = contact
 
+    def to_dict(self):
+        return {"_id": self._id, "_name": self._name, "_address": self._address,
+                "_phone": self._phone, "_contact": self._contact}
+
+    def to_tuple(self):
+        return self._id, self._name, self._address, self._phone, self._contact
+
     def __str__(self):
         return (f"Buyer(ID={self._id},"
                 f" Имя='{self._name}',"
@@ -88,6 +197,8 @@ class Buyer:
 
 
 class BuyerShort:
+    __slots__ = ("id", "name", "phone")
+
     def __init__(self, buyer):
         if not isinstance(buyer, Buyer):
             raise TypeError("Аргумент должен быть объектом класса Buyer.")
@@ -103,160 +214,1326 @@ class BuyerShort:
         return f"BuyerShort(ID={self.id}, Имя={self.name}, Телефон={self.phone})"
 
 
+class BuyerTable:
+    def __init__(self, items=()):
+        self._ids = array("q")
+        self._names = []
+        self._addresses = []
+        self._phones = []
+        self._contacts = []
+        self._row_of = array("q")
+        self._base = 0
+        self._count = 0
+        for buyer_id, buyer in items:
+            self[buyer_id] = buyer
+
+    def _row(self, buyer_id):
+        if isinstance(self._row_of, dict):
+            return self._row_of.get(buyer_id)
+        index = buyer_id - self._base if isinstance(buyer_id, int) else -1
+        if 0 <= index < len(self._row_of):
+            row = self._row_of[index]
+            if row >= 0:
+                return row
+        return None
+
+    def _set_row(self, buyer_id, row):
+        if isinstance(self._row_of, dict):
+            self._row_of[buyer_id] = row
+            return
+        if not self._row_of:
+            self._base = buyer_id
+        low = min(self._base, buyer_id)
+        high = max(self._base + len(self._row_of), buyer_id + 1)
+        if high - low > 2 * self._count + 1024:
+            self._row_of = {self._base + index: r for index, r in enumerate(self._row_of) if r >= 0}
+            self._row_of[buyer_id] = row
+            return
+        if low < self._base:
+            self._row_of = array("q", [-1]) * (self._base - low) + self._row_of
+            self._base = low
+        if high > self._base + len(self._row_of):
+            self._row_of.extend([-1] * (high - self._base - len(self._row_of) + len(self._row_of) // 2))
+        self._row_of[buyer_id - self._base] = row
+
+    def _view(self, row):
+        return Buyer.from_trusted(self._ids[row], self._names[row], self._addresses[row],
+                                  self._phones[row], self._contacts[row])
+
+    def _live_rows(self):
+        return (row for row, phone in enumerate(self._phones) if phone is not None)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, buyer_id):
+        return self._row(buyer_id) is not None
+
+    def __iter__(self):
+        return (self._ids[row] for row in self._live_rows())
+
+    def __getitem__(self, buyer_id):
+        row = self._row(buyer_id)
+        if row is None:
+            raise KeyError(buyer_id)
+        return self._view(row)
+
+    def __setitem__(self, buyer_id, buyer):
+        if not isinstance(buyer_id, int):
+            raise KeyError(buyer_id)
+        name = sys.intern(buyer.get_name())
+        address = buyer.get_address()
+        phone = buyer.get_phone()
+        contact = sys.intern(buyer.get_contact())
+        row = self._row(buyer_id)
+        if row is None:
+            self._set_row(buyer_id, len(self._ids))
+            self._ids.append(buyer_id)
+            self._names.append(name)
+            self._addresses.append(address)
+            self._phones.append(phone)
+            self._contacts.append(contact)
+            self._count += 1
+        else:
+            self._names[row] = name
+            self._addresses[row] = address
+            self._phones[row] = phone
+            self._contacts[row] = contact
+
+    def __delitem__(self, buyer_id):
+        self.pop(buyer_id)
+
+    def get(self, buyer_id, default=None):
+        row = self._row(buyer_id)
+        return default if row is None else self._view(row)
+
+    def pop(self, buyer_id, *default):
+        row = self._row(buyer_id)
+        if row is None:
+            if default:
+                return default[0]
+            raise KeyError(buyer_id)
+        buyer = self._view(row)
+        if isinstance(self._row_of, dict):
+            del self._row_of[buyer_id]
+        else:
+            self._row_of[buyer_id - self._base] = -1
+        self._names[row] = self._addresses[row] = self._phones[row] = self._contacts[row] = None
+        self._count -= 1
+        if len(self._ids) > 2 * self._count + 1024:
+            self._compact()
+        return buyer
+
+    def _compact(self):
+        rows = list(self._live_rows())
+        self._ids = array("q", (self._ids[row] for row in rows))
+        self._names = [self._names[row] for row in rows]
+        self._addresses = [self._addresses[row] for row in rows]
+        self._phones = [self._phones[row] for row in rows]
+        self._contacts = [self._contacts[row] for row in rows]
+        self._row_of = array("q")
+        for row, buyer_id in enumerate(self._ids):
+            self._set_row(buyer_id, row)
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (self._view(row) for row in self._live_rows())
+
+    def items(self):
+        return ((self._ids[row], self._view(row)) for row in self._live_rows())
+
+    def copy(self):
+        table = BuyerTable()
+        table._ids = array("q", self._ids)
+        table._names = list(self._names)
+        table._addresses = list(self._addresses)
+        table._phones = list(self._phones)
+        table._contacts = list(self._contacts)
+        table._row_of = dict(self._row_of) if isinstance(self._row_of, dict) else array("q", self._row_of)
+        table._base = self._base
+        table._count = self._count
+        return table
+
+
+DURABILITY_MODES = ("none", "group", "fsync")
+
+
+@contextmanager
+def atomic_write(path, mode="w", fsync=False, **kwargs):
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, mode, **kwargs) as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if fsync:
+        directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def name_tokens(name):
+    return set(name.lower().split())
+
+
+SNAPSHOT_CHUNK_SIZE = 64
+SNAPSHOT_FIELDS = ("id", "name", "address", "phone", "contact")
+
+
+def snapshot_sort_key(field):
+    column = SNAPSHOT_FIELDS.index(field)
+    return lambda row: (row[column], row[0])
+
+
+class BuyerSnapshot:
+    __slots__ = ("version", "_pages", "_counts", "_count", "_offsets")
+
+    def __init__(self, version=0, pages=(), counts=None):
+        self.version = version
+        self._pages = pages
+        self._counts = tuple(sum(map(len, page)) for page in pages) if counts is None else counts
+        self._count = sum(self._counts)
+        self._offsets = None
+
+    @classmethod
+    def from_rows(cls, rows, version=0):
+        rows = tuple(rows)
+        chunks = tuple(rows[start:start + SNAPSHOT_CHUNK_SIZE]
+                       for start in range(0, len(rows), SNAPSHOT_CHUNK_SIZE))
+        return cls(version, tuple(chunks[start:start + SNAPSHOT_CHUNK_SIZE]
+                                  for start in range(0, len(chunks), SNAPSHOT_CHUNK_SIZE)))
+
+    @classmethod
+    def from_buyers(cls, buyers, version=0):
+        return cls.from_rows((buyer.to_tuple() for buyer in buyers), version)
+
+    def __len__(self):
+        return self._count
+
+    def _locate(self, index):
+        if self._offsets is None:
+            offsets, position = [], 0
+            for page_count in self._counts:
+                offsets.append(position)
+                position += page_count
+            self._offsets = offsets
+        p = max(bisect_right(self._offsets, index) - 1, 0)
+        index -= self._offsets[p] if self._offsets else 0
+        for c, chunk in enumerate(self._pages[p] if self._pages else ()):
+            if index < len(chunk):
+                return p, c, index
+            index -= len(chunk)
+        return len(self._pages), 0, 0
+
+    def rows(self, start=0):
+        p, c, i = self._locate(start)
+        for page in self._pages[p:]:
+            for chunk in page[c:]:
+                yield from chunk[i:] if i else chunk
+                i = 0
+            c = 0
+
+    def __iter__(self):
+        for page in self._pages:
+            for chunk in page:
+                for row in chunk:
+                    yield Buyer.from_trusted(*row)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return [Buyer.from_trusted(*row) for row in islice(self.rows(start), max(stop - start, 0))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Индекс снимка вне диапазона")
+        p, c, i = self._locate(index)
+        return Buyer.from_trusted(*self._pages[p][c][i])
+
+
+class SnapshotEditor:
+    def __init__(self, snapshot):
+        self.pages = list(snapshot._pages)
+        self.counts = list(snapshot._counts)
+
+    def _chunk(self, p, c):
+        page = self.pages[p]
+        if isinstance(page, tuple):
+            page = self.pages[p] = list(page)
+        chunk = page[c]
+        if isinstance(chunk, tuple):
+            chunk = page[c] = list(chunk)
+        return chunk
+
+    def append(self, row):
+        if not self.pages or len(self.pages[-1][-1]) >= SNAPSHOT_CHUNK_SIZE:
+            if not self.pages or len(self.pages[-1]) >= SNAPSHOT_CHUNK_SIZE:
+                self.pages.append([])
+                self.counts.append(0)
+            if isinstance(self.pages[-1], tuple):
+                self.pages[-1] = list(self.pages[-1])
+            self.pages[-1].append([])
+        p, c = len(self.pages) - 1, len(self.pages[-1]) - 1
+        self._chunk(p, c).append(row)
+        self.counts[p] += 1
+        return p * SNAPSHOT_CHUNK_SIZE + c
+
+    def replace(self, position, row):
+        chunk = self._chunk(*divmod(position, SNAPSHOT_CHUNK_SIZE))
+        i = next(i for i, old in enumerate(chunk) if old[0] == row[0])
+        old, chunk[i] = chunk[i], row
+        return old
+
+    def remove(self, position, buyer_id):
+        p, c = divmod(position, SNAPSHOT_CHUNK_SIZE)
+        chunk = self._chunk(p, c)
+        i = next(i for i, old in enumerate(chunk) if old[0] == buyer_id)
+        self.counts[p] -= 1
+        return chunk.pop(i)
+
+    def _find_sorted(self, key, value):
+        p = bisect_left(self.pages, value, key=lambda page: key(page[-1][-1]))
+        if p == len(self.pages):
+            p -= 1
+        c = bisect_left(self.pages[p], value, key=lambda chunk: key(chunk[-1]))
+        if c == len(self.pages[p]):
+            c -= 1
+        return p, c
+
+    def insert_sorted(self, row, key):
+        if not self.pages:
+            self.pages.append([[row]])
+            self.counts.append(1)
+            return
+        p, c = self._find_sorted(key, key(row))
+        chunk = self._chunk(p, c)
+        insort(chunk, row, key=key)
+        self.counts[p] += 1
+        if len(chunk) > 2 * SNAPSHOT_CHUNK_SIZE:
+            page = self.pages[p]
+            page[c:c + 1] = [chunk[:SNAPSHOT_CHUNK_SIZE], chunk[SNAPSHOT_CHUNK_SIZE:]]
+            if len(page) > 2 * SNAPSHOT_CHUNK_SIZE:
+                tail = page[SNAPSHOT_CHUNK_SIZE:]
+                tail_count = sum(map(len, tail))
+                self.pages[p:p + 1] = [page[:SNAPSHOT_CHUNK_SIZE], tail]
+                self.counts[p:p + 1] = [self.counts[p] - tail_count, tail_count]
+
+    def remove_sorted(self, row, key):
+        if not self.pages:
+            return
+        value = key(row)
+        p, c = self._find_sorted(key, value)
+        chunk = self._chunk(p, c)
+        i = bisect_left(chunk, value, key=key)
+        if i == len(chunk) or key(chunk[i]) != value:
+            return
+        del chunk[i]
+        self.counts[p] -= 1
+        if not chunk:
+            del self.pages[p][c]
+            if not self.pages[p]:
+                del self.pages[p]
+                del self.counts[p]
+
+    def capacity(self):
+        return (len(self.pages) - 1) * SNAPSHOT_CHUNK_SIZE + len(self.pages[-1]) if self.pages else 0
+
+    def finish(self, version):
+        pages = tuple(page if isinstance(page, tuple)
+                      else tuple(chunk if isinstance(chunk, tuple) else tuple(chunk) for chunk in page)
+                      for page in self.pages)
+        return BuyerSnapshot(version, pages, tuple(self.counts))
+
+
 class BuyerRep:
-    def __init__(self, filepath=""):
+    def __init__(self, filepath="", trusted=False, store=dict, workers=1, durability="none", group_commit_ms=50,
+                 write_behind=False):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Неизвестный режим надежности '{durability}'.")
         self.filepath = filepath
-        self.buyers = []
+        self.buyer_factory = Buyer.from_trusted if trusted else Buyer
+        self.workers = workers
+        self.durability = durability
+        self.group_commit_ms = group_commit_ms
+        self.write_behind = write_behind or durability == "group"
+        self._pending_changes = []
+        self._writer = None
+        self._writer_cond = threading.Condition()
+        self._writer_snapshot = None
+        self._queued = 0
+        self._saved = 0
+        self._flush_requested = False
+        self._closing = False
+        self.store = store
+        self._buyers_by_id = store()
+        self._ids_by_phone = {}
+        self._name_index = {}
+        self._name_tokens = []
+        self._sort_views = {}
+        self._sort_field = None
+        self._batch_changes = None
+        self._undo_log = None
+        self._snapshot = None
+        self._snapshot_chunks = None
+        self._sorted_snapshot = None
+        self._snapshot_changes = None
+        self._snapshot_owner = None
         self.next_id = 1
         if os.path.exists(self.filepath):
             self.load_data()
 
+    @property
+    def buyers(self):
+        if self._sort_field is None:
+            return list(self._buyers_by_id.values())
+        return [self._buyers_by_id[buyer_id] for _, buyer_id in self._sort_view(self._sort_field)]
+
+    @buyers.setter
+    def buyers(self, buyers):
+        if self._undo_log is not None:
+            self._undo_log.append(("state", (self._buyers_by_id, self._ids_by_phone, self._name_index, self._name_tokens,
+                                             self._sort_views, self._snapshot, self._snapshot_chunks,
+                                             self._sorted_snapshot)))
+        self._buyers_by_id = self.store((b.get_id(), b) for b in buyers)
+        self._ids_by_phone = {}
+        name_index = {}
+        for buyer in self._buyers_by_id.values():
+            self._ids_by_phone[buyer.get_phone()] = buyer.get_id()
+            for token in name_tokens(buyer.get_name()):
+                name_index.setdefault(token, set()).add(buyer.get_id())
+        self._name_index = name_index
+        self._name_tokens = sorted(name_index)
+        self._sort_views = {}
+        if self._snapshot is not None:
+            self._build_snapshot()
+
+    def _build_snapshot(self):
+        if self._undo_log is not None:
+            self._undo_log.append(("snapshot", (self._snapshot, self._snapshot_chunks, self._sorted_snapshot)))
+        version = self._snapshot.version + 1 if self._snapshot is not None else 1
+        self._set_snapshot(BuyerSnapshot.from_buyers(self._buyers_by_id.values(), version))
+        self._sorted_snapshot = None
+        if self._snapshot_changes is not None:
+            self._snapshot_changes = []
+
+    def _sort_view(self, field):
+        view = self._sort_views.get(field)
+        if view is None:
+            getter = getattr(Buyer, f"get_{field}")
+            view = sorted((getter(b), b.get_id()) for b in self._buyers_by_id.values())
+            self._sort_views[field] = view
+        return view
+
+    def _add_secondary(self, buyer):
+        self._ids_by_phone[buyer.get_phone()] = buyer.get_id()
+        for token in name_tokens(buyer.get_name()):
+            ids = self._name_index.get(token)
+            if ids is None:
+                ids = self._name_index[token] = set()
+                insort(self._name_tokens, token)
+            ids.add(buyer.get_id())
+        for field, view in self._sort_views.items():
+            insort(view, (getattr(buyer, f"get_{field}")(), buyer.get_id()))
+
+    def _remove_secondary(self, buyer):
+        if self._ids_by_phone.get(buyer.get_phone()) == buyer.get_id():
+            del self._ids_by_phone[buyer.get_phone()]
+        for token in name_tokens(buyer.get_name()):
+            ids = self._name_index.get(token)
+            if ids is None:
+                continue
+            ids.discard(buyer.get_id())
+            if not ids:
+                del self._name_index[token]
+                del self._name_tokens[bisect_left(self._name_tokens, token)]
+        for field, view in self._sort_views.items():
+            entry = (getattr(buyer, f"get_{field}")(), buyer.get_id())
+            i = bisect_left(view, entry)
+            if i < len(view) and view[i] == entry:
+                del view[i]
+
+    def _set_snapshot(self, snapshot):
+        self._snapshot_chunks = {}
+        for p, page in enumerate(snapshot._pages):
+            for c, chunk in enumerate(page):
+                position = p * SNAPSHOT_CHUNK_SIZE + c
+                for row in chunk:
+                    self._snapshot_chunks[row[0]] = position
+        self._snapshot = snapshot
+
+    def _publish(self, changes):
+        if self._snapshot is None:
+            return
+        if self._snapshot_changes is not None:
+            self._snapshot_changes.extend(changes)
+            return
+        self._apply_changes(changes)
+
+    def _apply_changes(self, changes):
+        editor = SnapshotEditor(self._snapshot)
+        if self._sorted_snapshot is not None:
+            field, sorted_snapshot = self._sorted_snapshot
+            sorted_editor, key = SnapshotEditor(sorted_snapshot), snapshot_sort_key(field)
+        else:
+            sorted_editor = None
+        for action, buyer_id, buyer in changes:
+            position = self._snapshot_chunks.get(buyer_id)
+            if action == "delete":
+                if position is None:
+                    continue
+                old = editor.remove(position, buyer_id)
+                del self._snapshot_chunks[buyer_id]
+            else:
+                row = buyer.to_tuple()
+                if position is None:
+                    old = None
+                    self._snapshot_chunks[buyer_id] = editor.append(row)
+                else:
+                    old = editor.replace(position, row)
+            if sorted_editor is not None:
+                if old is not None:
+                    sorted_editor.remove_sorted(old, key)
+                if action != "delete":
+                    sorted_editor.insert_sorted(row, key)
+        version = self._snapshot.version + 1
+        if editor.capacity() * SNAPSHOT_CHUNK_SIZE > 2 * sum(editor.counts) + SNAPSHOT_CHUNK_SIZE ** 2:
+            self._set_snapshot(BuyerSnapshot.from_rows(editor.finish(version).rows(), version))
+        else:
+            self._snapshot = editor.finish(version)
+        if sorted_editor is not None:
+            self._sorted_snapshot = (field, sorted_editor.finish(version))
+
+    @contextmanager
+    def _deferred_snapshot(self):
+        if self._snapshot_changes is not None:
+            yield
+            return
+        self._snapshot_changes = []
+        self._snapshot_owner = threading.current_thread()
+        try:
+            yield
+        finally:
+            changes, self._snapshot_changes = self._snapshot_changes, None
+            self._snapshot_owner = None
+        self._publish(changes)
+
+    def snapshot(self):
+        if self._snapshot is None:
+            self._build_snapshot()
+        elif self._snapshot_changes and self._snapshot_owner is threading.current_thread():
+            changes, self._snapshot_changes = self._snapshot_changes, []
+            self._apply_changes(changes)
+        return self._snapshot
+
+    def _index_buyer(self, buyer):
+        if self._undo_log is not None:
+            self._undo_log.append(("buyer", (buyer.get_id(), self._buyers_by_id.get(buyer.get_id()))))
+        self._buyers_by_id[buyer.get_id()] = buyer
+        self._publish([("add", buyer.get_id(), buyer)])
+        self._add_secondary(buyer)
+
+    def _reindex_buyer(self, buyer):
+        old_buyer = self._buyers_by_id.get(buyer.get_id())
+        if old_buyer is None:
+            self._index_buyer(buyer)
+            return
+        if self._undo_log is not None:
+            self._undo_log.append(("buyer", (buyer.get_id(), old_buyer)))
+        self._remove_secondary(old_buyer)
+        self._buyers_by_id[buyer.get_id()] = buyer
+        self._publish([("replace", buyer.get_id(), buyer)])
+        self._add_secondary(buyer)
+
+    def _unindex_buyer(self, buyer_id):
+        buyer = self._buyers_by_id.pop(buyer_id, None)
+        if buyer is None:
+            return False
+        if self._undo_log is not None:
+            self._undo_log.append(("buyer", (buyer_id, buyer)))
+        self._publish([("delete", buyer_id, None)])
+        self._remove_secondary(buyer)
+        return True
+
+    def _phone_taken(self, phone, buyer_id=None):
+        owner = self._ids_by_phone.get(phone)
+        if owner is None or owner == buyer_id:
+            return False
+        print(f"Покупатель с телефоном {phone} уже существует.")
+        return True
+
+    def _build_buyers(self, rows):
+        if self.buyer_factory is not Buyer:
+            return [self.buyer_factory(*row) for row in rows]
+        if self.workers <= 1 or len(rows) < self.workers:
+            chunk_errors = [validate_buyer_rows(1, rows)]
+        else:
+            chunk_errors = validate_rows_in_processes(rows, self.workers)
+        invalid = set()
+        for errors in chunk_errors:
+            for position, message in errors:
+                print(f"Запись {position}: {message}")
+                invalid.add(position - 1)
+        return [Buyer.from_trusted(*row) for i, row in enumerate(rows) if i not in invalid]
+
     def load_data(self):
         pass
 
     def save_data(self):
         pass
 
-    def get_all_buyers(self):
+    def save_change(self, action, buyer_id, buyer=None):
+        if self._batch_changes is not None:
+            self._batch_changes.append((action, buyer_id, buyer))
+        else:
+            self._persist([(action, buyer_id, buyer)])
+
+    def _persist(self, changes):
+        if not self.write_behind:
+            self.save_changes(changes)
+            return
+        self.snapshot()
+        with self._writer_cond:
+            self._pending_changes.extend(changes)
+            self._queued += 1
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="buyers-writer", daemon=True)
+                self._writer.start()
+            self._writer_cond.notify_all()
+
+    def _write_loop(self):
+        lag = self.group_commit_ms / 1000
+        while True:
+            with self._writer_cond:
+                while not self._pending_changes and not self._closing:
+                    self._writer_cond.wait()
+                if not self._pending_changes:
+                    return
+                deadline = time.monotonic() + lag
+                while not self._flush_requested and not self._closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._writer_cond.wait(remaining)
+                changes, self._pending_changes = self._pending_changes, []
+                target = self._queued
+                self._flush_requested = False
+                self._writer_snapshot = self._snapshot
+            try:
+                self.save_changes(changes)
+            except Exception as e:
+                print(f"Ошибка фоновой записи: {e}")
+            finally:
+                with self._writer_cond:
+                    self._writer_snapshot = None
+                    self._saved = target
+                    self._writer_cond.notify_all()
+
+    def _saved_buyers(self):
+        if threading.current_thread() is self._writer:
+            return self._writer_snapshot
         return self.buyers
 
+    def flush(self):
+        with self._writer_cond:
+            target = self._queued
+            while self._saved < target and self._writer is not None and self._writer.is_alive():
+                self._flush_requested = True
+                self._writer_cond.notify_all()
+                self._writer_cond.wait(0.1)
+
+    def close(self):
+        self.flush()
+        with self._writer_cond:
+            writer, self._writer = self._writer, None
+            self._closing = True
+            self._writer_cond.notify_all()
+        if writer is not None:
+            writer.join()
+        self._closing = False
+
+    def save_changes(self, changes):
+        self.save_data()
+
+    def _rollback(self, undo_log, snapshots):
+        self._undo_log = None
+        self._snapshot_changes = []
+        try:
+            for kind, entry in reversed(undo_log):
+                if kind == "state":
+                    (self._buyers_by_id, self._ids_by_phone, self._name_index, self._name_tokens, self._sort_views,
+                     self._snapshot, self._snapshot_chunks, self._sorted_snapshot) = entry
+                elif kind == "snapshot":
+                    self._snapshot, self._snapshot_chunks, self._sorted_snapshot = entry
+                elif entry[1] is None:
+                    self._unindex_buyer(entry[0])
+                else:
+                    self._reindex_buyer(entry[1])
+        finally:
+            self._snapshot_changes = None
+            if self._snapshot is not snapshots[0]:
+                self._set_snapshot(snapshots[0])
+            self._sorted_snapshot = snapshots[1]
+
+    @contextmanager
+    def batch(self):
+        if self._batch_changes is not None:
+            yield self
+            return
+        saved_next_id = self.next_id
+        saved_snapshots = (self._snapshot, self._sorted_snapshot)
+        self._batch_changes = []
+        self._undo_log = []
+        try:
+            with self._deferred_snapshot():
+                yield self
+        except BaseException:
+            self._rollback(self._undo_log, saved_snapshots)
+            self.next_id = saved_next_id
+            raise
+        finally:
+            changes, self._batch_changes = self._batch_changes, None
+            self._undo_log = None
+        if changes:
+            self._persist(changes)
+
+    def add_buyers(self, buyers):
+        with self.batch():
+            for name, address, phone, contact in buyers:
+                if not self.add_buyer(name, address, phone, contact):
+                    raise ValueError("Не удалось добавить покупателя")
+        return True
+
+    def get_all_buyers(self):
+        snapshot = self.snapshot()
+        if self._sort_field is None:
+            return snapshot
+        if self._sorted_snapshot is None or self._sorted_snapshot[0] != self._sort_field:
+            rows = sorted(snapshot.rows(), key=snapshot_sort_key(self._sort_field))
+            self._sorted_snapshot = (self._sort_field, BuyerSnapshot.from_rows(rows, snapshot.version))
+        return self._sorted_snapshot[1]
+
+    def iter_buyers(self, batch_size=1000):
+        yield from self.get_all_buyers()
+
     def add_buyer(self, name, address, phone, contact):
+        if self._phone_taken(phone):
+            return False
         new_buyer = Buyer(self.next_id, name, address, phone, contact)
-        self.buyers.append(new_buyer)
+        self._index_buyer(new_buyer)
         self.next_id += 1
-        self.save_data()
+        self.save_change("add", new_buyer.get_id(), new_buyer)
         return True
 
     def delete_buyer(self, buyer_id):
-        self.buyers = [b for b in self.buyers if b.get_id() != buyer_id]
-        self.save_data()
+        if not self._unindex_buyer(buyer_id):
+            return False
+        self.save_change("delete", buyer_id)
         return True
 
     def get_buyer_by_id(self, buyer_id):
-        for buyer in self.buyers:
-            if buyer.get_id() == buyer_id:
-                return buyer
-        return None
-
-    def get_k_n_short_list(self, k, n):
-        return [BuyerShort(b) for b in self.buyers[k - 1:k + n - 1]]
+        return self._buyers_by_id.get(buyer_id)
+
+    def get_buyer_by_phone(self, phone):
+        buyer_id = self._ids_by_phone.get(phone)
+        return None if buyer_id is None else self._buyers_by_id.get(buyer_id)
+
+    def find_buyers_by_name(self, prefix, limit=None):
+        prefix = prefix.lower()
+        ids = {}
+        i = bisect_left(self._name_tokens, prefix)
+        while i < len(self._name_tokens) and self._name_tokens[i].startswith(prefix):
+            for buyer_id in sorted(self._name_index[self._name_tokens[i]]):
+                if limit is not None and len(ids) >= limit:
+                    break
+                ids.setdefault(buyer_id)
+            i += 1
+        return [self._buyers_by_id[buyer_id] for buyer_id in ids]
+
+    def get_k_n_short_list(self, k, n, field=None):
+        field = field.lower() if field else self._sort_field
+        if field is None:
+            return [BuyerShort(b) for b in self.snapshot()[k - 1:k + n - 1]]
+        return [BuyerShort(self._buyers_by_id[buyer_id])
+                for _, buyer_id in self._sort_view(field)[k - 1:k + n - 1]]
 
     def sort_by_field(self, field):
         try:
-            self.buyers.sort(key=lambda x: getattr(x, f"get_{field.lower()}")())
+            self._sort_view(field.lower())
         except AttributeError:
             print(f"Поле '{field}' не найдено или у него нет геттера.")
+            return
+        self._sort_field = field.lower()
 
     def get_count(self):
-        return len(self.buyers)
+        return len(self._buyers_by_id)
 
     def replace_buyer(self, buyer_id, name, address, phone, contact):
-        for i, buyer in enumerate(self.buyers):
-            if buyer.get_id() == buyer_id:
-                self.buyers[i] = Buyer(buyer_id, name, address, phone, contact)
-                self.save_data()
-                return True
-        return False
+        if buyer_id not in self._buyers_by_id or self._phone_taken(phone, buyer_id):
+            return False
+        buyer = Buyer(buyer_id, name, address, phone, contact)
+        self._reindex_buyer(buyer)
+        self.save_change("replace", buyer_id, buyer)
+        return True
 
 
 class BuyerRepJSON(BuyerRep):
-    def __init__(self, filepath="buyers.json"):
-        super().__init__(filepath)
+    def __init__(self, filepath="buyers.json", journal=False, compact_threshold=1024 * 1024, trusted=False,
+                 store=dict, workers=1, durability="none", group_commit_ms=50, write_behind=False):
+        self.journal = journal
+        self.journal_path = filepath + ".log"
+        self.compact_threshold = compact_threshold
+        self._journal_size = 0
+        super().__init__(filepath, trusted, store, workers, durability, group_commit_ms, write_behind)
+        if journal and not os.path.exists(filepath) and os.path.exists(self.journal_path):
+            self.load_data()
 
     def load_data(self):
         try:
-            with open(self.filepath, "r") as f:
-                data = json.load(f)
-                for item in data:
-                    self.buyers.append(Buyer(*item.values()))
-                self.next_id = max(b.get_id() for b in self.buyers) + 1 if self.buyers else 1
+            if os.path.exists(self.filepath):
+                with open(self.filepath, "r") as f:
+                    data = json.load(f)
+                    self.buyers = self._build_buyers([tuple(item.values()) for item in data])
+            if self.journal:
+                self._replay_journal()
+            self.next_id = max(self.next_id, max(self._buyers_by_id, default=0) + 1)
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Ошибка при загрузке из JSON: {e}")
 
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        offset = 0
+        with open(self.journal_path, "rb") as f, self._deferred_snapshot():
+            for line_number, line in enumerate(f, 1):
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Неполная запись")
+                    entry = json.loads(line)
+                except ValueError:
+                    print(f"Журнал поврежден в строке {line_number}, остальные записи пропущены.")
+                    break
+                offset += len(line)
+                op = entry.get("op") if isinstance(entry, dict) else None
+                if op == "delete" and isinstance(entry.get("id"), int):
+                    self._unindex_buyer(entry["id"])
+                elif op in ("add", "replace") and isinstance(entry.get("buyer"), dict):
+                    row = tuple(entry["buyer"].get(key) for key in Buyer.__slots__)
+                    message = validate_buyer_row(row)
+                    if message is not None:
+                        print(f"Запись {line_number}: {message}")
+                        continue
+                    self._reindex_buyer(Buyer.from_trusted(*row))
+                    self.next_id = max(self.next_id, row[0] + 1)
+                else:
+                    print(f"Запись {line_number}: Некорректная запись журнала.")
+        if offset < os.path.getsize(self.journal_path):
+            os.truncate(self.journal_path, offset)
+        self._journal_size = offset
+
+    def save_changes(self, changes):
+        if not self.journal or not os.path.exists(self.filepath):
+            self.save_data()
+            return
+        lines = []
+        for action, buyer_id, buyer in changes:
+            if action == "delete":
+                entry = {"op": action, "id": buyer_id}
+            else:
+                entry = {"op": action, "buyer": buyer.to_dict()}
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        data = "".join(lines).encode("utf-8")
+        with open(self.journal_path, "ab") as f:
+            f.write(data)
+            if self.durability != "none":
+                f.flush()
+                os.fsync(f.fileno())
+        self._journal_size += len(data)
+        if self._journal_size >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        self.save_data()
+
     def save_data(self):
         try:
-            data = [vars(b) for b in self.buyers]
-            with open(self.filepath, "w") as f:
+            data = [b.to_dict() for b in self._saved_buyers()]
+            with atomic_write(self.filepath, "w", self.durability != "none") as f:
                 json.dump(data, f, ensure_ascii=False, indent=4)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+            if self.journal:
+                open(self.journal_path, "w").close()
+                self._journal_size = 0
+        except (OSError, TypeError) as e:
             print(f"Ошибка при сохранении в JSON: {e}")
 
 
 class BuyerRepYAML(BuyerRep):
-    def __init__(self, filepath="buyers.yaml"):
-        super().__init__(filepath)
+    def __init__(self, filepath="buyers.yaml", trusted=False, store=dict, multi_document=False, workers=1,
+                 durability="none", group_commit_ms=50, write_behind=False):
+        self.multi_document = multi_document
+        super().__init__(filepath, trusted, store, workers, durability, group_commit_ms, write_behind)
 
     def load_data(self):
         try:
             with open(self.filepath, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
-                if data:
-                    for buyer_data in data:
-                        self.buyers.append(Buyer(*buyer_data.values()))
-                    self.next_id = max(b.get_id() for b in self.buyers) + 1 if self.buyers else 1
+                rows = []
+                for document in yaml.load_all(f, Loader=YAML_LOADER):
+                    if not document:
+                        continue
+                    for buyer_data in document if isinstance(document, list) else (document,):
+                        rows.append(tuple(buyer_data[key] for key in Buyer.__slots__))
+                buyers = self._build_buyers(rows)
+                if buyers:
+                    self.buyers = buyers
+                    self.next_id = max(self._buyers_by_id) + 1
         except (FileNotFoundError, yaml.YAMLError) as e:
             print(f"Ошибка при загрузке из YAML: {e}")
 
     def save_data(self):
         try:
-            data = [vars(b) for b in self.buyers]
-            with open(self.filepath, "w", encoding="utf-8") as f:
-                yaml.dump(data, f, allow_unicode=True, default_flow_style=False)
-        except (FileNotFoundError, yaml.YAMLError) as e:
+            buyers = self._saved_buyers()
+            with atomic_write(self.filepath, "w", self.durability != "none", encoding="utf-8") as f:
+                if self.multi_document:
+                    yaml.dump_all((b.to_dict() for b in buyers), f, Dumper=YAML_DUMPER,
+                                  allow_unicode=True, default_flow_style=False, sort_keys=False,
+                                  explicit_start=True)
+                else:
+                    yaml.dump([b.to_dict() for b in buyers], f, Dumper=YAML_DUMPER,
+                              allow_unicode=True, default_flow_style=False, sort_keys=False)
+        except (OSError, yaml.YAMLError) as e:
             print(f"Ошибка при сохранении в YAML: {e}")
 
 
+BINARY_MAGIC = b"BUYR"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sHxxQqQ")
+BINARY_ID = struct.Struct("<q")
+BINARY_LENGTH = struct.Struct("<I")
+BINARY_OFFSET = struct.Struct("<Q")
+BINARY_ID_ENTRY = struct.Struct("<qQ")
+
+
+def encode_buyer(buyer):
+    parts = [BINARY_ID.pack(buyer.get_id())]
+    for value in (buyer.get_name(), buyer.get_address(), buyer.get_phone(), buyer.get_contact()):
+        data = value.encode("utf-8")
+        parts.append(BINARY_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+class BuyerRepBinary(BuyerRep):
+    def __init__(self, filepath="buyers.bin", trusted=True, store=dict, durability="none", group_commit_ms=50,
+                 write_behind=False):
+        self._mm = None
+        self._map_readers = {}
+        self._count = 0
+        self._order_table = 0
+        self._id_table = 0
+        super().__init__(filepath, trusted, store, durability=durability, group_commit_ms=group_commit_ms,
+                         write_behind=write_behind)
+
+    def load_data(self):
+        try:
+            with open(self.filepath, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, count, next_id, order_table = BINARY_HEADER.unpack_from(mm, 0)
+            if magic != BINARY_MAGIC or version != BINARY_VERSION:
+                mm.close()
+                raise ValueError("неизвестный формат файла")
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Ошибка при загрузке из бинарного файла: {e}")
+            return
+        self._mm = mm
+        self._count = count
+        self._order_table = order_table
+        self._id_table = order_table + count * BINARY_OFFSET.size
+        self.next_id = next_id
+
+    def _close_map(self):
+        if self._mm is not None:
+            if not self._map_readers.get(id(self._mm)):
+                self._mm.close()
+            self._mm = None
+
+    def close(self):
+        super().close()
+        self._close_map()
+
+    def _decode(self, offset, mm=None):
+        mm = mm or self._mm
+        (buyer_id,) = BINARY_ID.unpack_from(mm, offset)
+        offset += BINARY_ID.size
+        fields = []
+        for _ in range(4):
+            (length,) = BINARY_LENGTH.unpack_from(mm, offset)
+            offset += BINARY_LENGTH.size
+            fields.append(mm[offset:offset + length].decode("utf-8"))
+            offset += length
+        return self.buyer_factory(buyer_id, *fields)
+
+    def _offset_at(self, position, mm=None, order_table=None):
+        if mm is None:
+            mm, order_table = self._mm, self._order_table
+        return BINARY_OFFSET.unpack_from(mm, order_table + position * BINARY_OFFSET.size)[0]
+
+    def _find_offset(self, buyer_id):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            entry_id, offset = BINARY_ID_ENTRY.unpack_from(self._mm, self._id_table + middle * BINARY_ID_ENTRY.size)
+            if entry_id < buyer_id:
+                low = middle + 1
+            elif entry_id > buyer_id:
+                high = middle
+            else:
+                return offset
+        return None
+
+    def _materialize(self):
+        if self._mm is None:
+            return
+        self.buyers = [self._decode(self._offset_at(position)) for position in range(self._count)]
+
+    @property
+    def buyers(self):
+        self._materialize()
+        return BuyerRep.buyers.fget(self)
+
+    @buyers.setter
+    def buyers(self, buyers):
+        self._close_map()
+        BuyerRep.buyers.fset(self, buyers)
+
+    def snapshot(self):
+        self._materialize()
+        return super().snapshot()
+
+    def get_buyer_by_id(self, buyer_id):
+        if self._mm is None:
+            return super().get_buyer_by_id(buyer_id)
+        offset = self._find_offset(buyer_id)
+        return None if offset is None else self._decode(offset)
+
+    def get_k_n_short_list(self, k, n, field=None):
+        if self._mm is None or field is not None:
+            return super().get_k_n_short_list(k, n, field)
+        positions = range(max(k - 1, 0), min(k + n - 1, self._count))
+        return [BuyerShort(self._decode(self._offset_at(position))) for position in positions]
+
+    def get_count(self):
+        return self._count if self._mm is not None else super().get_count()
+
+    def iter_buyers(self, batch_size=1000):
+        if self._mm is None:
+            yield from super().iter_buyers(batch_size)
+            return
+        mm, count, order_table = self._mm, self._count, self._order_table
+        self._map_readers[id(mm)] = self._map_readers.get(id(mm), 0) + 1
+        try:
+            for position in range(count):
+                yield self._decode(self._offset_at(position, mm, order_table), mm)
+        finally:
+            self._map_readers[id(mm)] -= 1
+            if not self._map_readers[id(mm)]:
+                del self._map_readers[id(mm)]
+                if mm is not self._mm:
+                    mm.close()
+
+    def get_buyer_by_phone(self, phone):
+        self._materialize()
+        return super().get_buyer_by_phone(phone)
+
+    def find_buyers_by_name(self, prefix, limit=None):
+        self._materialize()
+        return super().find_buyers_by_name(prefix, limit)
+
+    def add_buyer(self, name, address, phone, contact):
+        self._materialize()
+        return super().add_buyer(name, address, phone, contact)
+
+    def delete_buyer(self, buyer_id):
+        self._materialize()
+        return super().delete_buyer(buyer_id)
+
+    def replace_buyer(self, buyer_id, name, address, phone, contact):
+        self._materialize()
+        return super().replace_buyer(buyer_id, name, address, phone, contact)
+
+    def sort_by_field(self, field):
+        self._materialize()
+        super().sort_by_field(field)
+
+    def batch(self):
+        self._materialize()
+        return super().batch()
+
+    def save_data(self):
+        buyers = self._saved_buyers()
+        try:
+            with atomic_write(self.filepath, "wb", self.durability != "none") as f:
+                f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, 0, 0))
+                position = BINARY_HEADER.size
+                entries = []
+                for start in range(0, len(buyers), 10000):
+                    records = []
+                    for buyer in buyers[start:start + 10000]:
+                        record = encode_buyer(buyer)
+                        entries.append((buyer.get_id(), position))
+                        records.append(record)
+                        position += len(record)
+                    f.write(b"".join(records))
+                f.write(struct.pack(f"<{len(entries)}Q", *(offset for _, offset in entries)))
+                f.write(b"".join(BINARY_ID_ENTRY.pack(*entry) for entry in sorted(entries)))
+                f.seek(0)
+                f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(entries), self.next_id, position))
+        except OSError as e:
+            print(f"Ошибка при сохранении в бинарный файл: {e}")
+
+
+PREPARABLE_QUERY = re.compile(r"\s*(SELECT|INSERT|UPDATE|DELETE|VALUES|WITH)\b", re.IGNORECASE)
+QUERY_PLACEHOLDER = re.compile(r"%%|%s")
+
+
+def numbered_placeholders(query):
+    position = count(1)
+    return QUERY_PLACEHOLDER.sub(lambda m: "%" if m.group() == "%%" else f"${next(position)}", query)
+
+
+class QueryResult:
+    def __init__(self, rows, rowcount):
+        self.rows = rows
+        self.rowcount = rowcount
+        self._position = 0
+
+    def fetchone(self):
+        if self._position >= len(self.rows):
+            return None
+        self._position += 1
+        return self.rows[self._position - 1]
+
+    def fetchall(self):
+        rows = self.rows[self._position:]
+        self._position = len(self.rows)
+        return rows
+
+
 class DatabaseConnector:
     __instance = None
 
     @staticmethod
     def get_instance(host, user, password, database, port=5432):
         if DatabaseConnector.__instance is None:
-            DatabaseConnector(host, user, password, database, port)
+            DatabaseConnector.__instance = DatabaseConnector(host, user, password, database, port)
         return DatabaseConnector.__instance
 
-    def __init__(self, host, user, password, database, port=5432):
-        if DatabaseConnector.__instance is not None:
-            raise Exception("Это паттерн 'Одиночка'")
-        else:
-            DatabaseConnector.__instance = self
-            self.connection = None
-            self.cursor = None
+    def __init__(self, host, user, password, database, port=5432,
+                 min_size=1, max_size=10, idle_timeout=300, check_interval=30, prepare_threshold=5):
+        self._params = dict(host=host, user=user, password=password, database=database, port=port)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+        self.prepare_threshold = prepare_threshold
+        self._statements = weakref.WeakKeyDictionary()
+        self._statement_ids = count(1)
+        self._idle = []
+        self._size = 0
+        self._lock = threading.Condition()
+        self._local = threading.local()
+        self.connected = False
+        try:
+            for _ in range(min_size):
+                self._idle.append((self._connect(), time.monotonic()))
+                self._size += 1
+            self.connected = True
+        except psycopg2.Error as e:
+            print(f"Ошибка подключения к базе данных PostgreSQL: {e}")
+
+    def _connect(self):
+        connection = psycopg2.connect(**self._params)
+        with self._lock:
+            self._statements[connection] = {}
+        return connection
+
+    def _is_healthy(self, connection, last_used):
+        if connection.closed:
+            return False
+        idle = time.monotonic() - last_used
+        with self._lock:
+            if idle > self.idle_timeout and self._size > self.min_size:
+                return False
+        if idle > self.check_interval:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                connection.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _reap_idle(self):
+        expired = []
+        now = time.monotonic()
+        with self._lock:
+            while (self._idle and self._size > self.min_size
+                   and now - self._idle[0][1] > self.idle_timeout):
+                expired.append(self._idle.pop(0)[0])
+                self._size -= 1
+            if expired:
+                self._lock.notify_all()
+        for connection in expired:
+            if not connection.closed:
+                connection.close()
+
+    def _acquire(self):
+        self._reap_idle()
+        while True:
+            with self._lock:
+                while not self._idle and self._size >= self.max_size:
+                    self._lock.wait()
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                else:
+                    self._size += 1
+                    connection = None
+            if connection is None:
+                try:
+                    return self._connect()
+                except psycopg2.Error:
+                    self._discard(None)
+                    raise
+            if self._is_healthy(connection, last_used):
+                return connection
+            self._discard(connection)
+
+    def _discard(self, connection):
+        if connection is not None and not connection.closed:
+            connection.close()
+        with self._lock:
+            self._size -= 1
+            self._lock.notify()
+
+    def _release(self, connection):
+        if connection.closed:
+            self._discard(connection)
+            return
+        with self._lock:
+            self._idle.append((connection, time.monotonic()))
+            self._lock.notify()
+        self._reap_idle()
+
+    @contextmanager
+    def cursor(self, name=None):
+        pinned = getattr(self._local, "connection", None)
+        if pinned is not None:
             try:
-                self.connection = psycopg2.connect(
-                    host=host,
-                    user=user,
-                    password=password,
-                    database=database,
-                    port=port
-                )
-                self.cursor = self.connection.cursor()
-            except psycopg2.Error as e:
-                print(f"Ошибка подключения к базе данных PostgreSQL: {e}")
+                with pinned.cursor(name) as cursor:
+                    yield cursor
+            except psycopg2.Error:
+                self._local.failed = True
+                raise
+            return
+        connection = self._acquire()
+        try:
+            with connection.cursor(name) as cursor:
+                yield cursor
+            connection.commit()
+        except BaseException:
+            if not connection.closed:
+                connection.rollback()
+            raise
+        finally:
+            self._release(connection)
+
+    @contextmanager
+    def transaction(self):
+        if getattr(self._local, "connection", None) is not None:
+            yield self
+            return
+        connection = self._acquire()
+        self._local.connection = connection
+        self._local.failed = False
+        try:
+            yield self
+            if self._local.failed:
+                raise psycopg2.DatabaseError("Транзакция отменена из-за ошибки выполнения запроса")
+            connection.commit()
+        except BaseException:
+            if not connection.closed:
+                connection.rollback()
+            raise
+        finally:
+            self._local.connection = None
+            self._release(connection)
+
+    def _execute(self, cursor, query, params):
+        if (self.prepare_threshold is None or isinstance(params, dict)
+                or not PREPARABLE_QUERY.match(query)):
+            cursor.execute(query, params)
+            return
+        statements = self._statements[cursor.connection]
+        statement = statements.get(query)
+        if statement is None:
+            statement = statements[query] = [0, None]
+        if statement[1] is None:
+            statement[0] += 1
+            if statement[0] < self.prepare_threshold:
+                cursor.execute(query, params)
+                return
+            name = f"buyers_stmt_{next(self._statement_ids)}"
+            cursor.execute(f"PREPARE {name} AS {numbered_placeholders(query) if params is not None else query}")
+            statement[1] = name
+        if params:
+            cursor.execute(f"EXECUTE {statement[1]} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            cursor.execute(f"EXECUTE {statement[1]}")
 
     def execute_query(self, query, params=None):
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            self.connection.commit()
-            return self.cursor
+            with self.cursor() as cursor:
+                self._execute(cursor, query, params)
+                rows = cursor.fetchall() if cursor.description else []
+                return QueryResult(rows, cursor.rowcount)
+        except psycopg2.Error as e:
+            print(f"Ошибка выполнения запроса: {e}")
+            return None
+
+    def execute_values(self, query, rows, page_size=1000):
+        try:
+            with self.cursor() as cursor:
+                return psycopg2.extras.execute_values(cursor, query, rows,
+                                                      page_size=page_size, fetch=True)
         except psycopg2.Error as e:
             print(f"Ошибка выполнения запроса: {e}")
-            if self.connection:
-                self.connection.rollback()
             return None
 
     def close(self):
-        if self.connection:
-            self.cursor.close()
-            self.connection.close()
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for connection, _ in idle:
+            connection.close()
 
 
 class BuyerRepDB:
-    def __init__(self, db_connector):
+    SORT_COLUMNS = {"id": "ID", "name": "Name", "address": "Address", "phone": "Phone", "contact": "Contact"}
+
+    def __init__(self, db_connector, renumber_ids=False):
         self.db_connector = db_connector
+        self.renumber_ids = renumber_ids
+        self._cursor_ids = count(1)
 
     def initialize_db(self):
         cursor = self.db_connector.execute_query("""
@@ -270,24 +1547,93 @@ class BuyerRepDB:
         """)
         if cursor:
             print("База данных PostgreSQL и таблица 'Buyers' успешно созданы.")
+        for column in ("Name", "Address", "Contact"):
+            self.db_connector.execute_query(
+                f"CREATE INDEX IF NOT EXISTS buyers_{column.lower()}_idx ON Buyers ({column}, ID)")
+        self.db_connector.execute_query(
+            "CREATE INDEX IF NOT EXISTS buyers_name_prefix_idx ON Buyers (lower(Name) text_pattern_ops)")
+        self.db_connector.execute_query("""
+        CREATE TABLE IF NOT EXISTS BuyerTombstones (
+    ID INTEGER NOT NULL,
+    DeletedTxid BIGINT NOT NULL DEFAULT (txid_current() & 4294967295)
+        );
+        """)
+        self.db_connector.execute_query(
+            "CREATE INDEX IF NOT EXISTS buyer_tombstones_txid_idx ON BuyerTombstones (DeletedTxid)")
+        self.db_connector.execute_query("""
+        CREATE OR REPLACE FUNCTION buyers_tombstone() RETURNS trigger AS $$
+        BEGIN
+            IF OLD.ID > 0 AND (TG_OP = 'DELETE' OR NEW.ID <> OLD.ID) THEN
+                INSERT INTO BuyerTombstones (ID) VALUES (OLD.ID);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+        """)
+        self.db_connector.execute_query("DROP TRIGGER IF EXISTS buyers_tombstone ON Buyers")
+        self.db_connector.execute_query(
+            "CREATE TRIGGER buyers_tombstone AFTER DELETE OR UPDATE OF ID ON Buyers "
+            "FOR EACH ROW EXECUTE FUNCTION buyers_tombstone()")
+        if self.db_connector.execute_query("CREATE EXTENSION IF NOT EXISTS pg_trgm"):
+            self.db_connector.execute_query(
+                "CREATE INDEX IF NOT EXISTS buyers_name_trgm_idx ON Buyers USING gin (lower(Name) gin_trgm_ops)")
 
     def get_buyer_by_id(self, buyer_id):
         cursor = self.db_connector.execute_query("SELECT * FROM Buyers WHERE ID = %s", (buyer_id,))
         if cursor:
             result = cursor.fetchone()
             if result:
-                return Buyer(*result)
+                return Buyer.from_trusted(*result)
             else:
                 return None
         return None
 
-    def get_all_buyers(self):
-        cursor = self.db_connector.execute_query("SELECT ID, Name, Address, Phone, Contact FROM Buyers")
+    def get_buyer_by_phone(self, phone):
+        cursor = self.db_connector.execute_query(
+            "SELECT ID, Name, Address, Phone, Contact FROM Buyers WHERE Phone = %s", (phone,))
+        if cursor:
+            result = cursor.fetchone()
+            if result:
+                return Buyer.from_trusted(*result)
+        return None
+
+    def find_buyers_by_name(self, prefix, limit=None):
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        cursor = self.db_connector.execute_query(
+            "SELECT ID, Name, Address, Phone, Contact FROM Buyers "
+            "WHERE lower(Name) LIKE lower(%s) OR lower(Name) LIKE lower(%s) ORDER BY Name, ID LIMIT %s",
+            (pattern + "%", "% " + pattern + "%", limit)
+        )
+        if cursor:
+            return [Buyer.from_trusted(*row) for row in cursor.fetchall()]
+        return []
+
+    def _order_column(self, order_by):
+        column = self.SORT_COLUMNS.get(order_by.lower()) if order_by else "ID"
+        if column is None:
+            raise ValueError(f"Поле '{order_by}' не найдено.")
+        return column
+
+    def get_all_buyers(self, order_by=None):
+        query = "SELECT ID, Name, Address, Phone, Contact FROM Buyers"
+        if order_by:
+            query += f" ORDER BY {self._order_column(order_by)}, ID"
+        cursor = self.db_connector.execute_query(query)
         if cursor:
             results = cursor.fetchall()
-            return [Buyer(row[0], row[1], row[2], row[3], row[4]) for row in results]
+            return [Buyer.from_trusted(*row) for row in results]
         return []
 
+    def iter_buyers(self, batch_size=1000):
+        try:
+            with self.db_connector.cursor(f"iter_buyers_{next(self._cursor_ids)}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute("SELECT ID, Name, Address, Phone, Contact FROM Buyers ORDER BY ID")
+                for row in cursor:
+                    yield Buyer.from_trusted(*row)
+        except psycopg2.Error as e:
+            print(f"Ошибка выполнения запроса: {e}")
+
     def add_buyer(self, buyer: Buyer):
         if not isinstance(buyer, Buyer):
             raise TypeError("Аргумент должен быть объектом класса Buyer.")
@@ -303,6 +1649,25 @@ class BuyerRepDB:
             return buyer
         return None
 
+    def add_buyers(self, buyers, chunk_size=1000):
+        query = "INSERT INTO Buyers (Name, Address, Phone, Contact) VALUES %s RETURNING ID"
+        added = []
+        buyers = iter(buyers)
+        while True:
+            chunk = list(islice(buyers, chunk_size))
+            if not chunk:
+                break
+            if not all(isinstance(buyer, Buyer) for buyer in chunk):
+                raise TypeError("Аргумент должен быть объектом класса Buyer.")
+            rows = [(b.get_name(), b.get_address(), b.get_phone(), b.get_contact()) for b in chunk]
+            ids = self.db_connector.execute_values(query, rows, page_size=len(rows))
+            if ids is None:
+                break
+            for buyer, (buyer_id,) in zip(chunk, ids):
+                buyer.set_id(buyer_id)
+            added.extend(chunk)
+        return added
+
     def replace_buyer(self, buyer: Buyer):
         if not isinstance(buyer, Buyer):
             raise TypeError("Аргумент должен быть объектом класса Buyer.")
@@ -316,32 +1681,47 @@ class BuyerRepDB:
                                                          buyer.get_id()))
         if cursor and cursor.rowcount > 0:
             print("Данные покупателя успешно обновлены.")
-        else:
-            print("Покупатель с таким ID не найден или данные не изменены.")
+            return True
+        print("Покупатель с таким ID не найден или данные не изменены.")
+        return False
 
     def delete_buyer(self, buyer_id):
         try:
-            cursor = self.db_connector.execute_query(
-                "SELECT ID, Name, Address, Phone, Contact FROM Buyers WHERE ID > %s", (buyer_id,))
-            if cursor is None:
-                return False
-            buyers_to_update = cursor.fetchall()
-
-            cursor = self.db_connector.execute_query("DELETE FROM Buyers WHERE ID = %s", (buyer_id,))
-            if cursor is None or cursor.rowcount == 0:
-                print("Покупатель с таким ID не найден")
-                return False
-
-            for i, buyer_data in enumerate(buyers_to_update):
-                new_id = buyer_data[0] - 1
-                update_query = """UPDATE Buyers SET ID = %s WHERE ID = %s"""
-                self.db_connector.execute_query(update_query, (new_id, buyer_data[0]))
-
+            with self.db_connector.transaction():
+                cursor = self.db_connector.execute_query("DELETE FROM Buyers WHERE ID = %s", (buyer_id,))
+                if cursor is None or cursor.rowcount == 0:
+                    print("Покупатель с таким ID не найден")
+                    return False
+                if self.renumber_ids:
+                    self.db_connector.execute_query("UPDATE Buyers SET ID = -ID WHERE ID > %s", (buyer_id,))
+                    self.db_connector.execute_query("UPDATE Buyers SET ID = -ID - 1 WHERE ID < 0")
+                    self.db_connector.execute_query(
+                        "SELECT setval(pg_get_serial_sequence('buyers', 'id'), COALESCE(MAX(ID), 0) + 1, false) "
+                        "FROM Buyers")
             return True
         except Exception as e:
             print(f"Ошибка при удалении покупателя: {e}")
             return False
 
+    def get_watermark(self):
+        cursor = self.db_connector.execute_query(
+            "SELECT txid_snapshot_xmin(txid_current_snapshot()) & 4294967295")
+        return cursor.fetchone()[0] if cursor else None
+
+    def get_changed_buyers(self, since):
+        cursor = self.db_connector.execute_query(
+            "SELECT ID, Name, Address, Phone, Contact FROM Buyers WHERE xmin::text::bigint >= %s", (since,))
+        if cursor:
+            return [Buyer.from_trusted(*row) for row in cursor.fetchall()]
+        return None
+
+    def get_deleted_ids(self, since):
+        cursor = self.db_connector.execute_query(
+            "SELECT DISTINCT ID FROM BuyerTombstones WHERE DeletedTxid >= %s", (since,))
+        if cursor:
+            return [row[0] for row in cursor.fetchall()]
+        return None
+
     def get_count(self):
         cursor = self.db_connector.execute_query("SELECT COUNT(*) FROM Buyers")
         if cursor:
@@ -349,85 +1729,728 @@ class BuyerRepDB:
             return result[0] if result else 0
         return 0
 
-    def get_k_n_short_list(self, k, n):
+    def get_count_estimate(self):
+        cursor = self.db_connector.execute_query(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = 'buyers'::regclass")
+        result = cursor.fetchone() if cursor else None
+        if result is None or result[0] < 0:
+            return self.get_count()
+        return result[0]
+
+    def get_k_n_short_list(self, k, n, order_by=None):
         offset = k - 1
         limit = n
         cursor = self.db_connector.execute_query(
-            "SELECT ID, Name, Address, Phone, Contact FROM Buyers LIMIT %s OFFSET %s", (limit, offset)
+            f"SELECT ID, Name, Address, Phone, Contact FROM Buyers ORDER BY {self._order_column(order_by)}, ID "
+            "LIMIT %s OFFSET %s", (limit, offset)
         )
         if cursor:
             results = cursor.fetchall()
-            return [BuyerShort(Buyer(*row)) for row in results]
+            return [BuyerShort(Buyer.from_trusted(*row)) for row in results]
+        return []
+
+    def get_page_after(self, after_id=0, limit=100):
+        cursor = self.db_connector.execute_query(
+            "SELECT ID, Name, Address, Phone, Contact FROM Buyers WHERE ID > %s ORDER BY ID LIMIT %s",
+            (after_id, limit)
+        )
+        if cursor:
+            return [Buyer.from_trusted(*row) for row in cursor.fetchall()]
         return []
 
+    def iter_pages(self, limit=1000):
+        after_id = 0
+        while True:
+            page = self.get_page_after(after_id, limit)
+            if page:
+                yield page
+            if len(page) < limit:
+                return
+            after_id = page[-1].get_id()
+
+
+class LRUCache:
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._cleared = 0
+        self._invalidated = {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def token(self):
+        with self._lock:
+            return self._sequence
+
+    def put(self, key, value, token=None):
+        with self._lock:
+            if token is not None and (self._cleared > token or self._invalidated.get(key, 0) > token):
+                return
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._sequence += 1
+            self._invalidated[key] = self._sequence
+            if len(self._invalidated) > self.max_size:
+                self._cleared = self._sequence
+                self._invalidated.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sequence += 1
+            self._cleared = self._sequence
+            self._invalidated.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class CachedBuyerRepDB:
+    def __init__(self, db_rep, max_size=10_000, ttl=None, page_size=256):
+        self.db_rep = db_rep
+        self.buyer_cache = LRUCache(max_size, ttl)
+        self.page_cache = LRUCache(page_size, ttl)
+
+    def __getattr__(self, name):
+        return getattr(self.db_rep, name)
+
+    def _copy(self, buyer):
+        return Buyer.from_trusted(buyer.get_id(), buyer.get_name(), buyer.get_address(),
+                                  buyer.get_phone(), buyer.get_contact())
+
+    def get_buyer_by_id(self, buyer_id):
+        buyer = self.buyer_cache.get(buyer_id)
+        if buyer is None:
+            token = self.buyer_cache.token()
+            buyer = self.db_rep.get_buyer_by_id(buyer_id)
+            if buyer is None:
+                return None
+            self.buyer_cache.put(buyer_id, buyer, token)
+        return self._copy(buyer)
+
+    def get_count(self):
+        result = self.page_cache.get("count")
+        if result is None:
+            token = self.page_cache.token()
+            result = self.db_rep.get_count()
+            self.page_cache.put("count", result, token)
+        return result
+
+    def get_k_n_short_list(self, k, n, order_by=None):
+        key = ("short_list", k, n, order_by.lower() if order_by else None)
+        result = self.page_cache.get(key)
+        if result is None:
+            token = self.page_cache.token()
+            result = self.db_rep.get_k_n_short_list(k, n, order_by)
+            self.page_cache.put(key, result, token)
+        return list(result)
+
+    def add_buyer(self, buyer: Buyer):
+        result = self.db_rep.add_buyer(buyer)
+        self.page_cache.clear()
+        return result
+
+    def add_buyers(self, buyers, chunk_size=1000):
+        result = self.db_rep.add_buyers(buyers, chunk_size)
+        self.page_cache.clear()
+        return result
+
+    def replace_buyer(self, buyer: Buyer):
+        result = self.db_rep.replace_buyer(buyer)
+        self.buyer_cache.pop(buyer.get_id())
+        self.page_cache.clear()
+        return result
+
+    def delete_buyer(self, buyer_id):
+        result = self.db_rep.delete_buyer(buyer_id)
+        if self.db_rep.renumber_ids:
+            self.buyer_cache.clear()
+        else:
+            self.buyer_cache.pop(buyer_id)
+        self.page_cache.clear()
+        return result
+
+    def get_changed_buyers(self, since):
+        changed = self.db_rep.get_changed_buyers(since)
+        for buyer in changed or []:
+            self.buyer_cache.pop(buyer.get_id())
+        if changed:
+            self.page_cache.clear()
+        return changed
+
+    def get_deleted_ids(self, since):
+        deleted = self.db_rep.get_deleted_ids(since)
+        for buyer_id in deleted or []:
+            self.buyer_cache.pop(buyer_id)
+        if deleted:
+            self.page_cache.clear()
+        return deleted
+
+    def clear_cache(self):
+        self.buyer_cache.clear()
+        self.page_cache.clear()
+
+    def cache_stats(self):
+        return {"buyers": self.buyer_cache.stats(), "pages": self.page_cache.stats()}
+
+
+class AsyncBuyerRepDB:
+    SORT_COLUMNS = BuyerRepDB.SORT_COLUMNS
+    _order_column = BuyerRepDB._order_column
+
+    def __init__(self, host, user, password, database, port=5432, min_size=1, max_size=100, renumber_ids=False):
+        if asyncpg is None:
+            raise ImportError("Для AsyncBuyerRepDB требуется пакет asyncpg.")
+        self._params = dict(host=host, user=user, password=password, database=database, port=port)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.renumber_ids = renumber_ids
+        self.pool = None
+
+    async def open(self):
+        try:
+            self.pool = await asyncpg.create_pool(**self._params, min_size=self.min_size, max_size=self.max_size)
+            return True
+        except (OSError, asyncpg.PostgresError) as e:
+            print(f"Ошибка подключения к базе данных PostgreSQL: {e}")
+            return False
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def __aenter__(self):
+        if not await self.open():
+            raise ConnectionError("Не удалось подключиться к базе данных PostgreSQL.")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _run(self, method, query, *args):
+        try:
+            return await getattr(self.pool, method)(query, *args)
+        except asyncpg.PostgresError as e:
+            print(f"Ошибка выполнения запроса: {e}")
+            return None
+
+    async def get_buyer_by_id(self, buyer_id):
+        row = await self._run("fetchrow", "SELECT ID, Name, Address, Phone, Contact FROM Buyers WHERE ID = $1",
+                              buyer_id)
+        return Buyer.from_trusted(*row) if row else None
+
+    async def get_all_buyers(self, order_by=None, batch_size=1000):
+        query = f"SELECT ID, Name, Address, Phone, Contact FROM Buyers ORDER BY {self._order_column(order_by)}, ID"
+        async with self.pool.acquire() as connection:
+            async with connection.transaction(readonly=True):
+                async for row in connection.cursor(query, prefetch=batch_size):
+                    yield Buyer.from_trusted(*row)
+
+    async def add_buyer(self, buyer: Buyer):
+        if not isinstance(buyer, Buyer):
+            raise TypeError("Аргумент должен быть объектом класса Buyer.")
+        buyer_id = await self._run("fetchval",
+                                   "INSERT INTO Buyers (Name, Address, Phone, Contact) "
+                                   "VALUES ($1, $2, $3, $4) RETURNING ID",
+                                   buyer.get_name(), buyer.get_address(), buyer.get_phone(), buyer.get_contact())
+        if buyer_id is None:
+            return None
+        buyer.set_id(buyer_id)
+        return buyer
+
+    async def replace_buyer(self, buyer: Buyer):
+        if not isinstance(buyer, Buyer):
+            raise TypeError("Аргумент должен быть объектом класса Buyer.")
+        status = await self._run("execute",
+                                 "UPDATE Buyers SET Name = $1, Address = $2, Phone = $3, Contact = $4 WHERE ID = $5",
+                                 buyer.get_name(), buyer.get_address(), buyer.get_phone(), buyer.get_contact(),
+                                 buyer.get_id())
+        if status and status != "UPDATE 0":
+            print("Данные покупателя успешно обновлены.")
+            return True
+        print("Покупатель с таким ID не найден или данные не изменены.")
+        return False
+
+    async def delete_buyer(self, buyer_id):
+        try:
+            async with self.pool.acquire() as connection:
+                async with connection.transaction():
+                    status = await connection.execute("DELETE FROM Buyers WHERE ID = $1", buyer_id)
+                    if status == "DELETE 0":
+                        print("Покупатель с таким ID не найден")
+                        return False
+                    if self.renumber_ids:
+                        await connection.execute("UPDATE Buyers SET ID = -ID WHERE ID > $1", buyer_id)
+                        await connection.execute("UPDATE Buyers SET ID = -ID - 1 WHERE ID < 0")
+                        await connection.execute(
+                            "SELECT setval(pg_get_serial_sequence('buyers', 'id'), COALESCE(MAX(ID), 0) + 1, false) "
+                            "FROM Buyers")
+            return True
+        except asyncpg.PostgresError as e:
+            print(f"Ошибка при удалении покупателя: {e}")
+            return False
+
+    async def get_count(self):
+        result = await self._run("fetchval", "SELECT COUNT(*) FROM Buyers")
+        return result or 0
+
+    async def get_count_estimate(self):
+        result = await self._run("fetchval", "SELECT reltuples::bigint FROM pg_class WHERE oid = 'buyers'::regclass")
+        if result is None or result < 0:
+            return await self.get_count()
+        return result
+
+    async def get_k_n_short_list(self, k, n, order_by=None):
+        rows = await self._run("fetch",
+                               f"SELECT ID, Name, Address, Phone, Contact FROM Buyers "
+                               f"ORDER BY {self._order_column(order_by)}, ID LIMIT $1 OFFSET $2", n, k - 1)
+        return [BuyerShort(Buyer.from_trusted(*row)) for row in rows or []]
+
 
 class BuyerRepDBAdapter(BuyerRep):
-    def __init__(self, db_connector):
-        super().__init__()
-        self.db_rep = BuyerRepDB(db_connector)
+    def __init__(self, db_connector, renumber_ids=False, store=dict, cache_size=0, cache_ttl=None):
+        super().__init__(store=store)
+        self.db_rep = BuyerRepDB(db_connector, renumber_ids)
+        if cache_size:
+            self.db_rep = CachedBuyerRepDB(self.db_rep, cache_size, cache_ttl)
+        self._watermark = self.db_rep.get_watermark()
         self.buyers = self.db_rep.get_all_buyers()
-        self.next_id = self.db_rep.get_count() + 1 if self.db_rep.get_count() > 0 else 1
+        self.next_id = max(self._buyers_by_id, default=0) + 1
 
     def add_buyer(self, name, address, phone, contact):
         try:
             new_buyer = Buyer(self.next_id, name, address, phone, contact)
             added_buyer = self.db_rep.add_buyer(new_buyer)
             if added_buyer:
-                self.buyers.append(added_buyer)
-                self.next_id = self.db_rep.get_count() + 1
+                self._index_buyer(added_buyer)
+                self.next_id = max(self.next_id, added_buyer.get_id() + 1)
                 return True
             return False
         except (psycopg2.Error, ValueError) as e:
             print(f"Ошибка при добавлении покупателя: {e}")
             return False
 
+    def add_buyers(self, buyers):
+        with self.batch():
+            new_buyers = [Buyer(self.next_id, name, address, phone, contact)
+                          for name, address, phone, contact in buyers]
+            added = self.db_rep.add_buyers(new_buyers)
+            if len(added) != len(new_buyers):
+                raise ValueError("Не удалось добавить покупателей")
+            for buyer in added:
+                self._index_buyer(buyer)
+            if added:
+                self.next_id = max(b.get_id() for b in added) + 1
+        return True
+
     def delete_buyer(self, buyer_id):
-        result = self.db_rep.delete_buyer(buyer_id)
-        self.buyers = self.db_rep.get_all_buyers()
-        self.next_id = self.db_rep.get_count() + 1 if self.db_rep.get_count() > 0 else 1
-        return result
+        if not self.db_rep.delete_buyer(buyer_id):
+            return False
+        if self.db_rep.renumber_ids:
+            self.buyers = [b if b.get_id() < buyer_id else
+                           Buyer.from_trusted(b.get_id() - 1, b.get_name(), b.get_address(), b.get_phone(),
+                                              b.get_contact())
+                           for b in self.buyers if b.get_id() != buyer_id]
+            self.next_id -= 1
+        else:
+            self._unindex_buyer(buyer_id)
+        return True
 
     def get_buyer_by_id(self, buyer_id):
         buyer_data = self.db_rep.get_buyer_by_id(buyer_id)
         return buyer_data
 
-    def get_all_buyers(self):
-        return self.db_rep.get_all_buyers()
+    def get_buyer_by_phone(self, phone):
+        return self.db_rep.get_buyer_by_phone(phone)
 
-    def get_k_n_short_list(self, k, n):
-        short_list_data = self.db_rep.get_k_n_short_list(k, n)
-        return short_list_data
+    def find_buyers_by_name(self, prefix, limit=None):
+        return self.db_rep.find_buyers_by_name(prefix, limit)
 
-    def sort_by_field(self, field):
-        buyers = self.get_all_buyers()
-        try:
-            buyers.sort(key=lambda x: getattr(x, f"_{field}"))
-            self.buyers = buyers
-        except AttributeError:
-            print(f"Поле '{field}' не найдено.")
+    def get_k_n_short_list(self, k, n, field=None):
+        short_list_data = self.db_rep.get_k_n_short_list(k, n, field or self._sort_field)
+        return short_list_data
 
     def replace_buyer(self, buyer_id, name, address, phone, contact):
-        buyer = self.get_buyer_by_id(buyer_id)
-        if buyer:
-            buyer.set_name(name)
-            buyer.set_address(address)
-            buyer.set_phone(phone)
-            buyer.set_contact(contact)
-            self.db_rep.replace_buyer(buyer)
-            self.buyers = self.db_rep.get_all_buyers()
+        buyer = Buyer(buyer_id, name, address, phone, contact)
+        if self.db_rep.replace_buyer(buyer):
+            self._reindex_buyer(buyer)
             print("Данные покупателя изменены")
-        else:
-            print("Покупатель не найден")
+            return True
+        print("Покупатель не найден")
+        return False
 
-    def get_count(self):
-        return self.db_rep.get_count()
+    def refresh(self):
+        with self.db_rep.db_connector.transaction():
+            watermark = self.db_rep.get_watermark()
+            changed = self.db_rep.get_changed_buyers(self._watermark)
+            deleted = self.db_rep.get_deleted_ids(self._watermark)
+        if watermark is None or changed is None or deleted is None:
+            return False
+        with self._deferred_snapshot():
+            for buyer_id in deleted:
+                self._unindex_buyer(buyer_id)
+            for buyer in changed:
+                self._reindex_buyer(buyer)
+        self.next_id = max(self.next_id, max((b.get_id() for b in changed), default=0) + 1)
+        self._watermark = watermark
+        return True
+
+    def get_count_estimate(self):
+        return self.db_rep.get_count_estimate()
+
+    @contextmanager
+    def batch(self):
+        with super().batch():
+            try:
+                with self.db_rep.db_connector.transaction():
+                    yield self
+            except BaseException:
+                if isinstance(self.db_rep, CachedBuyerRepDB):
+                    self.db_rep.clear_cache()
+                raise
 
     def save_data(self):
         pass
 
 
+class BuyerRepSQLite(BuyerRep):
+    SORT_COLUMNS = BuyerRepDB.SORT_COLUMNS
+
+    def __init__(self, filepath="buyers.db"):
+        super().__init__()
+        self.filepath = filepath
+        self.connection = sqlite3.connect(filepath, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.initialize_db()
+        row = self.connection.execute("SELECT MAX(ID) FROM Buyers").fetchone()
+        self.next_id = (row[0] or 0) + 1
+
+    def initialize_db(self):
+        self.connection.executescript("""
+        CREATE TABLE IF NOT EXISTS Buyers (
+            ID INTEGER PRIMARY KEY,
+            Name TEXT NOT NULL,
+            Address TEXT NOT NULL,
+            Phone TEXT NOT NULL UNIQUE,
+            Contact TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS BuyerNameTokens (
+            Token TEXT NOT NULL,
+            BuyerID INTEGER NOT NULL,
+            PRIMARY KEY (Token, BuyerID)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS buyers_name_idx ON Buyers (Name, ID);
+        CREATE INDEX IF NOT EXISTS buyers_address_idx ON Buyers (Address, ID);
+        CREATE INDEX IF NOT EXISTS buyers_contact_idx ON Buyers (Contact, ID);
+        CREATE INDEX IF NOT EXISTS buyer_name_tokens_buyer_idx ON BuyerNameTokens (BuyerID);
+        """)
+
+    def _order_column(self, field):
+        field = field or self._sort_field
+        column = self.SORT_COLUMNS.get(field.lower()) if field else "ID"
+        if column is None:
+            raise ValueError(f"Поле '{field}' не найдено.")
+        return column
+
+    def _select(self, where="", params=(), order_by=None, limit=None, offset=0):
+        query = f"SELECT ID, Name, Address, Phone, Contact FROM Buyers {where} ORDER BY {self._order_column(order_by)}, ID"
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params = (*params, limit, offset)
+        return self.connection.execute(query, params)
+
+    def _write_tokens(self, buyer):
+        self.connection.execute("DELETE FROM BuyerNameTokens WHERE BuyerID = ?", (buyer.get_id(),))
+        self.connection.executemany("INSERT INTO BuyerNameTokens (Token, BuyerID) VALUES (?, ?)",
+                                    [(token, buyer.get_id()) for token in name_tokens(buyer.get_name())])
+
+    @property
+    def buyers(self):
+        return self.get_all_buyers()
+
+    @buyers.setter
+    def buyers(self, buyers):
+        with self.batch():
+            self.connection.execute("DELETE FROM BuyerNameTokens")
+            self.connection.execute("DELETE FROM Buyers")
+            for buyer in buyers:
+                self._insert(buyer)
+
+    def _insert(self, buyer):
+        cursor = self.connection.execute(
+            "INSERT INTO Buyers (ID, Name, Address, Phone, Contact) VALUES (?, ?, ?, ?, ?)",
+            (buyer.get_id(), buyer.get_name(), buyer.get_address(), buyer.get_phone(), buyer.get_contact()))
+        buyer.set_id(cursor.lastrowid)
+        self._write_tokens(buyer)
+        self.next_id = max(self.next_id, buyer.get_id() + 1)
+
+    @contextmanager
+    def batch(self):
+        if self.connection.in_transaction:
+            yield self
+            return
+        saved_next_id = self.next_id
+        self.connection.execute("BEGIN")
+        try:
+            yield self
+        except BaseException:
+            self.connection.rollback()
+            self.next_id = saved_next_id
+            raise
+        self.connection.commit()
+
+    def get_all_buyers(self):
+        return [Buyer.from_trusted(*row) for row in self._select()]
+
+    def snapshot(self):
+        return BuyerSnapshot.from_buyers(self.get_all_buyers())
+
+    def iter_buyers(self, batch_size=1000):
+        cursor = self._select()
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield Buyer.from_trusted(*row)
+
+    def add_buyer(self, name, address, phone, contact):
+        buyer = Buyer(self.next_id, name, address, phone, contact)
+        try:
+            with self.batch():
+                self._insert(buyer)
+            return True
+        except sqlite3.IntegrityError:
+            print(f"Покупатель с телефоном {phone} уже существует.")
+            return False
+
+    def delete_buyer(self, buyer_id):
+        with self.batch():
+            self.connection.execute("DELETE FROM BuyerNameTokens WHERE BuyerID = ?", (buyer_id,))
+            cursor = self.connection.execute("DELETE FROM Buyers WHERE ID = ?", (buyer_id,))
+        return cursor.rowcount > 0
+
+    def replace_buyer(self, buyer_id, name, address, phone, contact):
+        buyer = Buyer(buyer_id, name, address, phone, contact)
+        try:
+            with self.batch():
+                cursor = self.connection.execute(
+                    "UPDATE Buyers SET Name = ?, Address = ?, Phone = ?, Contact = ? WHERE ID = ?",
+                    (name, address, phone, contact, buyer_id))
+                if cursor.rowcount == 0:
+                    return False
+                self._write_tokens(buyer)
+            return True
+        except sqlite3.IntegrityError:
+            print(f"Покупатель с телефоном {phone} уже существует.")
+            return False
+
+    def get_buyer_by_id(self, buyer_id):
+        row = self._select("WHERE ID = ?", (buyer_id,)).fetchone()
+        return Buyer.from_trusted(*row) if row else None
+
+    def get_buyer_by_phone(self, phone):
+        row = self._select("WHERE Phone = ?", (phone,)).fetchone()
+        return Buyer.from_trusted(*row) if row else None
+
+    def find_buyers_by_name(self, prefix, limit=None):
+        prefix = prefix.lower()
+        cursor = self.connection.execute(
+            "SELECT DISTINCT b.ID, b.Name, b.Address, b.Phone, b.Contact "
+            "FROM BuyerNameTokens t JOIN Buyers b ON b.ID = t.BuyerID "
+            "WHERE t.Token >= ? AND t.Token < ? ORDER BY t.Token, b.ID LIMIT ?",
+            (prefix, prefix + "\U0010ffff", -1 if limit is None else limit))
+        return [Buyer.from_trusted(*row) for row in cursor]
+
+    def get_k_n_short_list(self, k, n, field=None):
+        return [BuyerShort(Buyer.from_trusted(*row))
+                for row in self._select(order_by=field, limit=n, offset=k - 1)]
+
+    def sort_by_field(self, field):
+        if field.lower() not in self.SORT_COLUMNS:
+            print(f"Поле '{field}' не найдено или у него нет геттера.")
+            return
+        self._sort_field = field.lower()
+
+    def get_count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM Buyers").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+class ReadWriteLock:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = None
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        if self._writer is threading.current_thread():
+            yield
+            return
+        with self._cond:
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        current = threading.current_thread()
+        if self._writer is current:
+            yield
+            return
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = current
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = None
+                self._cond.notify_all()
+
+
+class ConcurrentBuyerRep:
+    def __init__(self, buyer_rep):
+        self.buyer_rep = buyer_rep
+        self.lock = ReadWriteLock()
+        self._locked_snapshot = isinstance(buyer_rep, BuyerRepSQLite)
+        buyer_rep.snapshot()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.buyer_rep, name)
+
+    @property
+    def buyers(self):
+        with self.lock.read():
+            return list(self.buyer_rep.get_all_buyers())
+
+    @property
+    def next_id(self):
+        with self.lock.read():
+            return self.buyer_rep.next_id
+
+    def snapshot(self):
+        if self._locked_snapshot:
+            with self.lock.read():
+                return self.buyer_rep.snapshot()
+        return self.buyer_rep.snapshot()
+
+    def get_all_buyers(self):
+        with self.lock.read():
+            return self.buyer_rep.get_all_buyers()
+
+    def iter_buyers(self, batch_size=1000):
+        yield from self.get_all_buyers()
+
+    def get_buyer_by_id(self, buyer_id):
+        with self.lock.read():
+            return self.buyer_rep.get_buyer_by_id(buyer_id)
+
+    def get_buyer_by_phone(self, phone):
+        with self.lock.read():
+            return self.buyer_rep.get_buyer_by_phone(phone)
+
+    def find_buyers_by_name(self, prefix, limit=None):
+        with self.lock.read():
+            return self.buyer_rep.find_buyers_by_name(prefix, limit)
+
+    def get_k_n_short_list(self, k, n, field=None):
+        with self.lock.read():
+            return self.buyer_rep.get_k_n_short_list(k, n, field)
+
+    def get_count(self):
+        with self.lock.read():
+            return self.buyer_rep.get_count()
+
+    def add_buyer(self, name, address, phone, contact):
+        with self.lock.write():
+            return self.buyer_rep.add_buyer(name, address, phone, contact)
+
+    def add_buyers(self, buyers):
+        with self.lock.write():
+            return self.buyer_rep.add_buyers(buyers)
+
+    def delete_buyer(self, buyer_id):
+        with self.lock.write():
+            return self.buyer_rep.delete_buyer(buyer_id)
+
+    def replace_buyer(self, buyer_id, name, address, phone, contact):
+        with self.lock.write():
+            return self.buyer_rep.replace_buyer(buyer_id, name, address, phone, contact)
+
+    def sort_by_field(self, field):
+        with self.lock.write():
+            self.buyer_rep.sort_by_field(field)
+
+    @contextmanager
+    def batch(self):
+        with self.lock.write():
+            with self.buyer_rep.batch():
+                yield self
+
+    def refresh(self):
+        with self.lock.write():
+            return self.buyer_rep.refresh()
+
+    def flush(self):
+        with self.lock.write():
+            self.buyer_rep.flush()
+
+    def close(self):
+        with self.lock.write():
+            self.buyer_rep.close()
+
+
 def run_operations(buyer_rep):
-    buyers = buyer_rep.get_all_buyers()
     while True:
         print("\nМеню:")
         print("1. Вывести всех покупателей")
@@ -444,7 +2467,7 @@ def run_operations(buyer_rep):
         try:
             if choice == "1":
                 print("\nВсе покупатели:")
-                for buyer in buyers:
+                for buyer in buyer_rep.iter_buyers():
                     print(buyer)
             elif choice == "2":
                 while True:
@@ -458,14 +2481,12 @@ def run_operations(buyer_rep):
                         print(f"Ошибка валидации: {e}")
 
                 if buyer_rep.add_buyer(name, address, phone, contact):
-                    buyers = buyer_rep.get_all_buyers()
                     print("Покупатель добавлен")
                 else:
                     print("Ошибка при добавлении покупателя")
             elif choice == "3":
                 buyer_id = int(input("Введите ID покупателя для удаления: "))
                 if buyer_rep.delete_buyer(buyer_id):
-                    buyers = buyer_rep.get_all_buyers()
                     print("Покупатель удален")
                 else:
                     print("Покупатель не найден или ошибка при удалении")
@@ -477,9 +2498,10 @@ def run_operations(buyer_rep):
                     address = input(f"Новый адрес ({buyer.get_address()}): ") or buyer.get_address()
                     phone = input(f"Новый телефон ({buyer.get_phone()}): ") or buyer.get_phone()
                     contact = input(f"Новый контакт ({buyer.get_contact()}): ") or buyer.get_contact()
-                    buyer_rep.replace_buyer(buyer_id, name, address, phone, contact)
-                    buyers = buyer_rep.get_all_buyers()
-                    print("Данные покупателя изменены")
+                    if buyer_rep.replace_buyer(buyer_id, name, address, phone, contact):
+                        print("Данные покупателя изменены")
+                    else:
+                        print("Ошибка при изменении данных покупателя")
                 else:
                     print("Покупатель не найден")
             elif choice == "5":
@@ -511,7 +2533,7 @@ def run_operations(buyer_rep):
 
 
 def run_prog():
-    storage_type = input("Выберите тип хранилища (db, json, yaml): ")
+    storage_type = input("Выберите тип хранилища (db, json, yaml, sqlite): ")
     db_connector = None
     try:
         if storage_type == "db":
@@ -520,19 +2542,24 @@ def run_prog():
             password = 'vadimb'
             database = 'Buyers'
             db_connector = DatabaseConnector.get_instance(host, user, password, database)
-            if db_connector.connection is None:
+            if not db_connector.connected:
                 print("Ошибка подключения к базе данных.")
                 return
             buyer_rep = BuyerRepDBAdapter(db_connector)
             buyer_rep.db_rep.initialize_db()
         elif storage_type == "json":
-            buyer_rep = BuyerRepJSON()
+            buyer_rep = BuyerRepJSON(write_behind=True)
         elif storage_type == "yaml":
-            buyer_rep = BuyerRepYAML()
+            buyer_rep = BuyerRepYAML(write_behind=True)
+        elif storage_type == "sqlite":
+            buyer_rep = BuyerRepSQLite()
         else:
             raise ValueError("Неподдерживаемый тип хранилища данных")
-        run_operations(buyer_rep)
-        if storage_type == "db" and db_connector:
+        try:
+            run_operations(buyer_rep)
+        finally:
+            buyer_rep.close()
+        if db_connector:
             db_connector.close()
     except ValueError as e:
         print(f"Ошибка: {e}")
@@ -0,0 +1,269 @@
+import json
+import os
+import random
+import threading
+
+import pytest
+
+import Buyers
+from Buyers import (Buyer, BuyerRep, BuyerRepBinary, BuyerRepJSON, BuyerRepSQLite, BuyerSnapshot, BuyerTable,
+                    ConcurrentBuyerRep, LRUCache, CachedBuyerRepDB)
+
+NAMES = ("Иван Иванов", "Анна Петрова", "Олег Смирнов", "Борис Попов")
+FIELDS = ("id", "name", "address", "phone", "contact")
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(Buyers, "SNAPSHOT_CHUNK_SIZE", 4)
+
+
+class Model:
+    def __init__(self):
+        self.rows = {}
+        self.phones = 0
+
+    def phone(self):
+        self.phones += 1
+        return f"+7{self.phones:010d}"
+
+
+def assert_matches(rep, rows):
+    assert rep.get_count() == len(rows)
+    snapshot = rep.get_all_buyers()
+    got = [buyer.to_tuple() for buyer in snapshot]
+    assert len(snapshot) == len(got) == len(rows)
+    if rep._sort_field is None:
+        assert sorted(got) == sorted(rows.values())
+    else:
+        column = FIELDS.index(rep._sort_field)
+        assert got == sorted(rows.values(), key=lambda row: (row[column], row[0]))
+    for index in range(0, len(got), 7):
+        assert snapshot[index].to_tuple() == got[index]
+        assert [buyer.to_tuple() for buyer in snapshot[index:index + 9]] == got[index:index + 9]
+    for row in rows.values():
+        assert rep.get_buyer_by_phone(row[3]).get_id() == row[0]
+    for name in NAMES:
+        expected = sorted(row[0] for row in rows.values() if row[1] == name)
+        assert sorted(b.get_id() for b in rep.find_buyers_by_name(name.split()[1])) == expected
+
+
+def random_step(rep, model, rnd):
+    action = rnd.random()
+    ids = list(model.rows)
+    if action < 0.5 or not ids:
+        row = (rep.next_id, rnd.choice(NAMES), f"ул. {rnd.randint(1, 9)}", model.phone(), "Анна")
+        assert rep.add_buyer(*row[1:])
+        model.rows[row[0]] = row
+    elif action < 0.75:
+        buyer_id = rnd.choice(ids)
+        assert rep.delete_buyer(buyer_id)
+        del model.rows[buyer_id]
+    else:
+        buyer_id = rnd.choice(ids)
+        row = (buyer_id, rnd.choice(NAMES), f"ул. {rnd.randint(1, 9)}", model.phone(), "Олег")
+        assert rep.replace_buyer(*row)
+        model.rows[buyer_id] = row
+
+
+@pytest.mark.parametrize("store", [dict, BuyerTable])
+@pytest.mark.parametrize("seed", range(3))
+def test_snapshot_matches_model(store, seed):
+    rnd = random.Random(seed)
+    rep, model = BuyerRep(store=store), Model()
+    for step in range(600):
+        if rnd.random() < 0.05:
+            rep.sort_by_field(rnd.choice(("name", "address", "phone", "id")))
+        if rnd.random() < 0.1:
+            before = dict(model.rows)
+            published = [buyer.to_tuple() for buyer in rep.snapshot()]
+            fail = rnd.random() < 0.5
+            try:
+                with rep.batch():
+                    for _ in range(rnd.randint(1, 30)):
+                        random_step(rep, model, rnd)
+                        if rnd.random() < 0.2:
+                            assert_matches(rep, model.rows)
+                    if fail:
+                        raise KeyError("rollback")
+            except KeyError:
+                model.rows = before
+                assert sorted(buyer.to_tuple() for buyer in rep.snapshot()) == sorted(published)
+        else:
+            random_step(rep, model, rnd)
+        if step % 25 == 0:
+            assert_matches(rep, model.rows)
+    assert_matches(rep, model.rows)
+
+
+def test_rollback_restores_indexes():
+    rep = BuyerRep()
+    rep.add_buyer("Иван Иванов", "ул. 1", "+70000000001", "Анна")
+    with pytest.raises(ValueError):
+        with rep.batch():
+            rep.replace_buyer(1, "Олег Смирнов", "ул. 2", "+70000000002", "Анна")
+            rep.add_buyer("Анна Петрова", "ул. 3", "+70000000003", "Анна")
+            raise ValueError("rollback")
+    assert rep.next_id == 2
+    assert rep.get_buyer_by_phone("+70000000001").get_name() == "Иван Иванов"
+    assert rep.get_buyer_by_phone("+70000000002") is None
+    assert rep.get_buyer_by_phone("+70000000003") is None
+    assert rep.find_buyers_by_name("олег") == []
+    assert [buyer.to_tuple() for buyer in rep.get_all_buyers()] == [(1, "Иван Иванов", "ул. 1", "+70000000001", "Анна")]
+
+
+def test_batch_reads_its_own_writes():
+    rep = BuyerRep()
+    before = rep.snapshot()
+    with rep.batch():
+        rep.add_buyer("Иван Иванов", "ул. 1", "+70000000001", "Анна")
+        assert rep.get_count() == len(rep.snapshot()) == len(rep.get_all_buyers()) == 1
+    assert len(before) == 0
+
+
+def test_snapshot_hands_out_copies():
+    rep = BuyerRep()
+    rep.add_buyer("Иван Иванов", "ул. 1", "+70000000001", "Анна")
+    snapshot = rep.snapshot()
+    buyer = snapshot[0]
+    buyer.set_id(42)
+    buyer.set_name("Олег Смирнов")
+    assert snapshot[0].to_tuple() == (1, "Иван Иванов", "ул. 1", "+70000000001", "Анна")
+    assert rep.get_buyer_by_id(1).get_name() == "Иван Иванов"
+
+
+def test_snapshot_from_rows_pages():
+    rows = [(i, "Иван Иванов", "ул. 1", f"+7{i:010d}", "Анна") for i in range(1, 100)]
+    snapshot = BuyerSnapshot.from_rows(rows, 3)
+    assert snapshot.version == 3
+    assert len(snapshot) == len(rows)
+    assert list(snapshot.rows(50)) == rows[50:]
+    assert [buyer.to_tuple() for buyer in snapshot[-3:]] == rows[-3:]
+    with pytest.raises(IndexError):
+        snapshot[len(rows)]
+
+
+@pytest.mark.parametrize("store", [dict, BuyerTable])
+def test_journal_reload_matches_model(tmp_path, store):
+    path = str(tmp_path / "buyers.json")
+    rnd, model = random.Random(1), Model()
+    rep = BuyerRepJSON(path, journal=True, store=store)
+    rep.save_data()
+    for _ in range(200):
+        random_step(rep, model, rnd)
+    assert_matches(BuyerRepJSON(path, journal=True, store=store), model.rows)
+
+
+def test_journal_skips_invalid_and_truncates_torn_tail(tmp_path, capsys):
+    path = str(tmp_path / "buyers.json")
+    rep = BuyerRepJSON(path, journal=True)
+    rep.add_buyer("Иван Иванов", "ул. 1", "+70000000001", "Анна")
+    rep.save_data()
+    rep.add_buyer("Анна Петрова", "ул. 2", "+70000000002", "Анна")
+    with open(path + ".log", "a", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "add", "buyer": {"_id": 7, "_name": "", "_address": "ул. 3",
+                                                   "_phone": "+70000000007", "_contact": "Анна"}}) + "\n")
+        f.write(json.dumps({"op": "add"}) + "\n")
+        good_size = f.tell()
+        f.write('{"op": "delete", "id": 1')
+    reloaded = BuyerRepJSON(path, journal=True)
+    output = capsys.readouterr().out
+    assert "Запись 2" in output and "Запись 3" in output
+    assert sorted(reloaded._buyers_by_id) == [1, 2]
+    assert os.path.getsize(path + ".log") == good_size
+
+
+@pytest.mark.parametrize("store", [dict, BuyerTable])
+def test_write_behind_saves_final_state(tmp_path, store):
+    path = str(tmp_path / "buyers.json")
+    rnd, model = random.Random(2), Model()
+    rep = BuyerRepJSON(path, store=store, write_behind=True, group_commit_ms=1)
+    for _ in range(300):
+        random_step(rep, model, rnd)
+    rep.close()
+    assert_matches(BuyerRepJSON(path, store=store), model.rows)
+
+
+def test_binary_iteration_survives_mutation(tmp_path):
+    path = str(tmp_path / "buyers.bin")
+    rep = BuyerRepBinary(path)
+    rep.add_buyers([("Иван Иванов", "ул. 1", f"+7{i:010d}", "Анна") for i in range(10)])
+    rep = BuyerRepBinary(path)
+    iterator = rep.iter_buyers()
+    first = next(iterator)
+    rep.delete_buyer(5)
+    assert [first.get_id()] + [buyer.get_id() for buyer in iterator] == list(range(1, 11))
+    assert rep._map_readers == {}
+
+
+def test_sqlite_does_not_reuse_ids(tmp_path):
+    rep = BuyerRepSQLite(str(tmp_path / "buyers.db"))
+    rep.add_buyer("Иван Иванов", "ул. 1", "+70000000001", "Анна")
+    rep.add_buyer("Иван Иванов", "ул. 1", "+70000000002", "Анна")
+    rep.delete_buyer(2)
+    rep.add_buyer("Иван Иванов", "ул. 1", "+70000000003", "Анна")
+    assert [buyer.get_id() for buyer in rep.get_all_buyers()] == [1, 3]
+    rep.close()
+
+
+def test_concurrent_sqlite_from_threads(tmp_path):
+    rep = ConcurrentBuyerRep(BuyerRepSQLite(str(tmp_path / "buyers.db")))
+    errors = []
+
+    def worker(index):
+        try:
+            for i in range(50):
+                rep.add_buyer("Иван Иванов", "ул. 1", f"+7{index}{i:09d}", "Анна")
+                rep.get_count()
+                rep.snapshot()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert rep.get_count() == len(rep.buyers) == 200
+    rep.close()
+
+
+def test_cache_skips_fill_raced_by_invalidation():
+    class SlowDB:
+        renumber_ids = False
+
+        def __init__(self):
+            self.row = Buyer.from_trusted(1, "Иван Иванов", "ул. 1", "+70000000001", "Анна")
+            self.reading = threading.Event()
+            self.resume = threading.Event()
+
+        def get_buyer_by_id(self, buyer_id):
+            row = self.row
+            self.reading.set()
+            self.resume.wait()
+            return row
+
+        def replace_buyer(self, buyer):
+            self.row = buyer
+            return True
+
+    db = SlowDB()
+    cache = CachedBuyerRepDB(db)
+    reader = threading.Thread(target=cache.get_buyer_by_id, args=(1,))
+    reader.start()
+    db.reading.wait()
+    cache.replace_buyer(Buyer.from_trusted(1, "Олег Смирнов", "ул. 1", "+70000000001", "Анна"))
+    db.resume.set()
+    reader.join()
+    assert cache.get_buyer_by_id(1).get_name() == "Олег Смирнов"
+
+
+def test_lru_cache_put_with_token():
+    cache = LRUCache(max_size=2)
+    token = cache.token()
+    cache.pop("a")
+    cache.put("a", 1, token)
+    cache.put("b", 2, token)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2